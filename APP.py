@@ -1,10 +1,23 @@
+import startup_profile
+
+_profile = startup_profile.StartupProfile() if startup_profile.enabled() else None
+
 import streamlit as st
-import pandas as pd
-from openpyxl import Workbook
-import json
 import datetime
+import hashlib
 import io
-from PIL import Image
+import sys
+import time
+
+# pandas, openpyxl, PIL and the data/fraud modules are imported inside the
+# functions that need them, so the login page does not pay for them.
+import perf_metrics
+from lead_cache import LeadSnapshot
+from lead_schema import BUSINESS_TYPES, CALL_STATUSES, COLUMNS, OPEN_STATUSES
+from user_directory import ROLES, UserDirectory
+
+if _profile:
+    _profile.mark("imports")
 
 # Page configuration
 st.set_page_config(page_title="Leads Management Portal", page_icon=":page_with_curl:", layout="wide")
@@ -24,36 +37,33 @@ st.markdown(
 )
 
 # Constants
-BUSINESS_TYPES = ["Manufacturer", "Distributor", "Wholesaler", "Retailer", "Service Provider"]
-CALL_STATUSES = ["Pending", "In Progress", "Completed", "Failed"]
-
 EXCEL_FILE = "Database.xlsx"
+DB_FILE = "leads.db"
+EVENTS_FILE = "lead_events.bin"
 USER_FILE = "users.json"
+FRAUD_CACHE_DIR = ".fraud_cache"
+FRAUD_POLL_SECONDS = 1.0
 SHEET_NAME = "Leads"
-COLUMNS = [
-    "Customer Name", "Mobile number", "Business Name", "Business type", "GOV", "City", 
-    "Lead Source", "Call status", "Tax registered (electronic invoices)", "Feedback", 
-    "Disqualified reason", "Comment", "Assigned Agent", "Date"
+LEAD_PICKER_SIZE = 200
+CAPACITY_LABEL = "Capacity"
+CAPACITY_HELP = "Relative share of leads for the capacity weighted assignment strategy (1 = standard)."
+# LeadStore methods whose latency shows up on the performance metrics page.
+STORE_TIMED_METHODS = [
+    "snapshot", "changes_since", "query", "count", "search", "distinct",
+    "insert_many", "insert_frame", "update", "assign_many", "delete", "export_excel",
 ]
 
-# Load or initialize user data
-def load_user_data():
-    try:
-        with open(USER_FILE, "r") as file:
-            users = json.load(file)
-            for user in users:
-                if "active" not in users[user]:
-                    users[user]["active"] = True
-            return users
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"admin": {"password": "admin", "role": "admin", "active": True}}
-
-def save_user_data(users):
-    with open(USER_FILE, "w") as file:
-        json.dump(users, file)
+@st.cache_resource
+def get_user_directory():
+    # One in-memory directory per process; reloads users.json only when it changes.
+    return UserDirectory(USER_FILE)
 
 # Read Excel file
+@perf_metrics.timed("data.read_excel")
 def read_excel(file_path, sheet_name, columns):
+    import pandas as pd
+    from openpyxl import Workbook
+
     try:
         df = pd.read_excel(file_path, sheet_name=sheet_name)
         df = df.dropna(how="all")
@@ -73,24 +83,103 @@ def read_excel(file_path, sheet_name, columns):
             raise e
     return df
 
-def update_excel(file_path, sheet_name, df):
-    with pd.ExcelWriter(file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
+@st.cache_resource
+def get_store():
+    # One store per server process; the first run migrates the existing workbook.
+    from lead_events import EventLog
+    from lead_store import LeadStore, start_compactor
+
+    store = LeadStore(DB_FILE, events=EventLog(EVENTS_FILE))
+    perf_metrics.REGISTRY.instrument(store, STORE_TIMED_METHODS, "store.")
+    store.migrate(lambda: read_excel(EXCEL_FILE, SHEET_NAME, COLUMNS))
+    store.rebuild_counts()
+    store.analyze()
+    start_compactor(store)
+    return store
+
+@st.cache_resource
+def _lead_snapshot(_store):
+    return LeadSnapshot(_store)
+
+def load_leads(store):
+    # Shared across sessions; catches up with other writers by replaying the journal tail.
+    with perf_metrics.timer("data.load_leads"):
+        version, frame = _lead_snapshot(store).read()
+    st.session_state.leads_version = version
+    return frame
+
+def session_cached(name, key, compute, version=None):
+    # Per-session results are recomputed only when `version` or `key` moves. Results derived from
+    # the loaded frame pass its version; store queries default to the current one, read before
+    # they run so a result is never tagged newer than its data.
+    if version is None:
+        version = _lead_snapshot(store).current_version()
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] != version or cached[1] != key:
+        cached = (version, key, compute())
+        st.session_state[name] = cached
+    return cached[2]
+
+@st.cache_resource
+def get_lead_index(_store):
+    from lead_index import LeadIndex
+
+    return _lead_snapshot(_store).attach(LeadIndex())
+
+@st.cache_resource
+def get_daily_rollup(_store):
+    from lead_metrics import ArchiveCounts, DailyRollup
+
+    return _lead_snapshot(_store).attach(DailyRollup(ArchiveCounts(_store)))
+
+@st.cache_resource
+def get_lead_counters(_store):
+    # Read straight from the store's counters, so the landing page never loads the snapshot.
+    from lead_metrics import LeadCounters
+
+    return LeadCounters(_store)
+
+@st.cache_resource
+def get_dispatcher(_store):
+    from lead_dispatch import LeadDispatcher
+    from lead_events import retry_counts
+
+    return _lead_snapshot(_store).attach(LeadDispatcher(retries=lambda: retry_counts(_store.events.load())))
+
+def get_agent_leads(data, agent):
+    # Index lookup: cost follows the agent's own leads, not the whole book.
+    from lead_index import rows
+
+    return session_cached(
+        "agent_leads", agent, lambda: rows(data, get_lead_index(store).agent_leads(agent)),
+        version=st.session_state.leads_version,
+    )
 
-def authenticate(username, password, users):
-    if username in users and users[username]["password"] == password and users[username]["active"]:
-        return True
-    return False
+def lead_label(data, lead_id):
+    lead = data.loc[lead_id]
+    return f"{lead['Customer Name']} - {lead['Mobile number']}"
+
+def lead_picker(label, data, filters, key):
+    # Indexed search narrows the choices; without a query the first leads are listed.
+    query = st.text_input("Search by name, business, mobile or city", key=f"{key}_search")
+    if query.strip():
+        matches = store.search(query, limit=20, filters=filters).index
+        candidates = data.index.intersection(matches, sort=False)
+        if not len(candidates):
+            st.info("No matching leads.")
+    else:
+        candidates = data.index[:LEAD_PICKER_SIZE]
+    return st.selectbox(label, candidates.tolist(), format_func=lambda i: lead_label(data, i), key=key)
 
-def get_filtered_data(data, status):
-    return data[data["Call status"] != status]
+def role_label(role):
+    return role.replace("_", " ").title()
 
 def login_ui():
     st.sidebar.header("Login")
     username = st.sidebar.text_input("Username")
     password = st.sidebar.text_input("Password", type="password")
     if st.sidebar.button("Login", key="login_button"):
-        if authenticate(username, password, users):
+        if directory.authenticate(username, password):
             st.session_state.logged_in = True
             st.session_state.username = username
             st.experimental_set_query_params(view="dashboard")
@@ -108,6 +197,8 @@ def navigation_ui(role):
     actions = {
         "Update Lead Status": "update",
         "View All Leads": "view_all",
+        "Lead History": "lead_history",
+        "Bulk Import Leads": "bulk_import",
         "Delete Lead": "delete",
         "Add User": "add_user",
         "Manage Users": "manage_users",
@@ -115,20 +206,45 @@ def navigation_ui(role):
         "View Performance": "view_performance",
         "My Leads": "my_leads",
         "Fraud Detection": "fraud_detection",
+        "Batch Receipt Scan": "fraud_batch",
+        "Performance Metrics": "perf_metrics",
     }
 
     if role == "agent":
         actions = {key: value for key, value in actions.items() if value in ["update", "my_leads", "fraud_detection"]}
+    elif role != "admin":
+        actions = {key: value for key, value in actions.items() if value != "perf_metrics"}
     
     for label, action in actions.items():
         if st.sidebar.button(label, key=f"nav_{action}"):
             st.experimental_set_query_params(view=action)
 
 def dashboard_ui():
+    import pandas as pd
+
     st.markdown("### Dashboard")
     st.markdown("Welcome to the Leads Management Portal!")
+    # Live counters patched by every write (in SQLite triggers); rendering never scans the book.
+    totals = get_lead_counters(store).totals()
+    by_status = totals["by_status"]
+    columns = st.columns(len(OPEN_STATUSES) + 3)
+    columns[0].metric("Open leads", totals["open"])
+    for column, status in zip(columns[1:], OPEN_STATUSES):
+        column.metric(status, by_status.get(status, 0))
+    columns[-2].metric("Completed", totals["completed"])
+    columns[-1].metric("Created today", totals["created_today"])
+
+    role = directory.role(st.session_state.username)
+    if role == "agent":
+        st.metric("My open leads", totals["by_agent"].get(st.session_state.username, 0))
+    else:
+        st.markdown("#### Open Leads per Agent")
+        per_agent = pd.Series({agent: totals["by_agent"].get(agent, 0) for agent in directory.agents()},
+                              name="Open leads", dtype=int)
+        per_agent["Unassigned"] = totals["unassigned"]
+        st.dataframe(per_agent.rename_axis("Agent"))
 
-def onboard_lead_ui(existing_data):
+def onboard_lead_ui():
     st.markdown("### Onboard New Lead")
     st.markdown("Enter the details of the new Lead below.")
     with st.form(key="lead_form", clear_on_submit=True):
@@ -169,18 +285,30 @@ def onboard_lead_ui(existing_data):
                     "Assigned Agent": "",
                     "Date": datetime.datetime.now().strftime("%Y-%m-%d")
                 }
-                existing_data = existing_data.append(new_lead, ignore_index=True)
-                update_excel(EXCEL_FILE, SHEET_NAME, existing_data)
+                store.insert(new_lead)
                 st.success("New lead details submitted successfully!")
 
-def update_lead_ui(existing_data, display_data):
+def update_lead_ui(existing_data):
+    from lead_store import ConflictError, LeadFilter
+
     st.markdown("### Update Lead Status")
-    agent_leads = display_data[display_data["Assigned Agent"] == st.session_state.username]
-    lead_names = agent_leads["Customer Name"].unique()
-    selected_lead = st.selectbox("Select Lead", lead_names)
-    if selected_lead:
-        lead_index = agent_leads[agent_leads["Customer Name"] == selected_lead].index[0]
-        lead_data = agent_leads.loc[lead_index]
+    agent_leads = get_agent_leads(existing_data, st.session_state.username)
+    lead_index = next_lead_ui(agent_leads)
+    if lead_index is None:
+        lead_index = lead_picker(
+            "Select Lead", agent_leads, LeadFilter(agent=st.session_state.username), "update_lead"
+        )
+    if lead_index is not None:
+        # The form and its expected version come from one read of the row (the snapshot may lag
+        # behind other workers), kept across the submit rerun.
+        editing = st.session_state.get("editing_lead")
+        if editing is None or editing[0] != lead_index:
+            current = store.get_versioned(lead_index)
+            if current is None:
+                st.info("This lead no longer exists.")
+                return
+            st.session_state.editing_lead = editing = (lead_index,) + current
+        lead_data = editing[1]
         with st.form(key="update_form", clear_on_submit=True):
             new_call_status = st.selectbox(
                 "Call Status",
@@ -206,47 +334,228 @@ def update_lead_ui(existing_data, display_data):
             new_disqualified_reason = st.text_area("Disqualified reason", value=lead_data["Disqualified reason"])
             new_update_button = st.form_submit_button("Update Lead")
             if new_update_button:
-                existing_data.at[lead_index, "Call status"] = new_call_status
-                existing_data.at[lead_index, "Feedback"] = new_feedback
-                existing_data.at[lead_index, "Comment"] = new_comment
-                existing_data.at[lead_index, "Business Name"] = new_business_name
-                existing_data.at[lead_index, "Business type"] = new_business_type
-                existing_data.at[lead_index, "GOV"] = new_gov
-                existing_data.at[lead_index, "City"] = new_city
-                existing_data.at[lead_index, "Lead Source"] = new_lead_source
-                existing_data.at[lead_index, "Tax registered (electronic invoices)"] = new_tax_registered
-                existing_data.at[lead_index, "Disqualified reason"] = new_disqualified_reason
-                update_excel(EXCEL_FILE, SHEET_NAME, existing_data)
-                st.success("Lead status updated successfully!")
-                
-                # Remove updated lead from the list
-                display_data = existing_data[existing_data["Call status"]!= "Completed"]
-                agent_leads = display_data[display_data["Assigned Agent"] == st.session_state.username]
-                lead_names = agent_leads["Customer Name"].unique()
-                selected_lead = st.selectbox("Select Lead", lead_names)
-
-def view_all_leads_ui(display_data):
+                expected_version = st.session_state.editing_lead[2]
+                del st.session_state.editing_lead
+                try:
+                    store.update(lead_index, {
+                        "Call status": new_call_status,
+                        "Feedback": new_feedback,
+                        "Comment": new_comment,
+                        "Business Name": new_business_name,
+                        "Business type": new_business_type,
+                        "GOV": new_gov,
+                        "City": new_city,
+                        "Lead Source": new_lead_source,
+                        "Tax registered (electronic invoices)": new_tax_registered,
+                        "Disqualified reason": new_disqualified_reason,
+                    }, expected_version=expected_version)
+                    st.success("Lead status updated successfully!")
+                except ConflictError:
+                    st.error("This lead was changed by someone else while you were editing it. "
+                             "Review the latest details and submit your update again.")
+
+def next_lead_ui(agent_leads):
+    # Serve leads from the agent's priority queue; "Next lead" skips the one on screen.
+    dispatcher = get_dispatcher(store)
+    agent = st.session_state.username
+    skipped = st.session_state.setdefault("dispatch_skipped", set())
+    col_next, col_manual, col_queue = st.columns([1, 1, 2])
+    col_queue.caption(f"{dispatcher.queue_length(agent)} leads in your queue")
+    if col_next.button("Next lead", key="next_lead"):
+        current = st.session_state.get("dispatched_lead")
+        if current is not None:
+            skipped.add(current)
+        lead_id = dispatcher.next_lead(agent, exclude=skipped)
+        if lead_id is None and skipped:
+            # Went through the whole queue; start over from the top.
+            skipped.clear()
+            lead_id = dispatcher.next_lead(agent)
+        st.session_state.dispatched_lead = lead_id
+        if lead_id is None:
+            st.info("Your queue is empty.")
+    if col_manual.button("Pick manually", key="pick_manually"):
+        st.session_state.dispatched_lead = None
+        skipped.clear()
+    lead_id = st.session_state.get("dispatched_lead")
+    if lead_id is None or lead_id not in agent_leads.index:
+        return None
+    st.markdown(f"**Next lead:** {lead_label(agent_leads, lead_id)} ({agent_leads.at[lead_id, 'Call status']})")
+    return lead_id
+
+def query_page(name, filters, sort_by, descending, page, page_size, archived=False):
+    from lead_store import page_key
+
+    # Keyset paging: the key ending each page seen so far starts the next one, so paging on never
+    # needs a deep OFFSET; a page jumped to is counted from the nearest earlier page already seen.
+    listing = (filters, sort_by, descending, page_size, archived)
+    cursors = st.session_state.get(name + "_cursors")
+    if cursors is None or cursors[0] != listing:
+        cursors = st.session_state[name + "_cursors"] = (listing, {1: None})
+    known = max(p for p in cursors[1] if p <= page)
+    page_data = session_cached(
+        name,
+        (listing, page),
+        lambda: store.query(
+            filters, sort_by=sort_by, descending=descending, offset=(page - known) * page_size,
+            limit=page_size, archived=archived, after=cursors[1][known],
+        ),
+    )
+    if not page_data.empty:
+        cursors[1][page + 1] = page_key(page_data, sort_by)
+    return page_data
+
+def view_all_leads_ui():
+    from lead_store import SORT_COLUMNS, LeadFilter
+
     st.markdown("### View All Leads")
-    st.dataframe(display_data)
+    # Filtering, sorting and paging run in SQLite; only the visible page is loaded.
+    agents = directory.agents(include_inactive=True)
+    col_status, col_agent, col_gov, col_city = st.columns(4)
+    statuses = col_status.multiselect(
+        "Call status", OPEN_STATUSES, key="va_status"
+    )
+    agent = col_agent.selectbox("Assigned Agent", ["All", "Unassigned"] + agents, key="va_agent")
+    govs, cities = session_cached("va_choices", None, lambda: (store.distinct("GOV"), store.distinct("City")))
+    gov = col_gov.selectbox("GOV", ["All"] + govs, key="va_gov")
+    city = col_city.selectbox("City", ["All"] + cities, key="va_city")
+
+    col_search, col_from, col_to = st.columns([2, 1, 1])
+    search = col_search.text_input("Search name, business or mobile", key="va_search")
+    use_dates = col_from.checkbox("Filter by date", key="va_use_dates")
+    date_from = col_from.date_input("From", value=datetime.date.today() - datetime.timedelta(days=30), key="va_from")
+    date_to = col_to.date_input("To", value=datetime.date.today(), key="va_to")
+
+    col_sort, col_order, col_size = st.columns(3)
+    sort_by = col_sort.selectbox("Sort by", ["Lead ID"] + SORT_COLUMNS, key="va_sort")
+    descending = col_order.checkbox("Descending", key="va_desc")
+    page_size = col_size.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="va_size")
+
+    filters = LeadFilter(
+        statuses=statuses,
+        agent=None if agent == "All" else ("" if agent == "Unassigned" else agent),
+        gov="" if gov == "All" else gov,
+        city="" if city == "All" else city,
+        date_from=date_from.isoformat() if use_dates else "",
+        date_to=date_to.isoformat() if use_dates else "",
+        search=search.strip(),
+    )
+    total = session_cached("va_total", filters, lambda: store.count(filters))
+    pages = max(1, -(-total // page_size))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key="va_page")
+    page_data = query_page(
+        "va_page_data", filters, None if sort_by == "Lead ID" else sort_by, descending, page, page_size
+    )
+    first = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Showing {first}–{first + len(page_data) - 1 if total else 0} of {total} leads (page {page} of {pages})")
+    st.dataframe(page_data)
+    if st.button("Export to Excel", key="export_excel"):
+        store.export_excel(EXCEL_FILE, SHEET_NAME)
+        st.success(f"Leads exported to {EXCEL_FILE}.")
+    export_leads_ui(filters, total)
+
+def lead_history_ui():
+    from lead_store import LeadFilter
+
+    st.markdown("### Lead History")
+    st.markdown("Completed leads, archived out of the working book. Editing one moves it back.")
+    agents = directory.agents(include_inactive=True)
+    col_agent, col_search = st.columns([1, 2])
+    agent = col_agent.selectbox("Assigned Agent", ["All", "Unassigned"] + agents, key="lh_agent")
+    search = col_search.text_input("Search name, business, mobile or city", key="lh_search")
+    col_use, col_from, col_to = st.columns(3)
+    use_dates = col_use.checkbox("Filter by date", key="lh_use_dates")
+    date_from = col_from.date_input("From", value=datetime.date.today() - datetime.timedelta(days=30), key="lh_from")
+    date_to = col_to.date_input("To", value=datetime.date.today(), key="lh_to")
+
+    filters = LeadFilter(
+        agent=None if agent == "All" else ("" if agent == "Unassigned" else agent),
+        date_from=date_from.isoformat() if use_dates else "",
+        date_to=date_to.isoformat() if use_dates else "",
+        search=search.strip(),
+    )
+    page_size = 50
+    total = session_cached("lh_total", filters, lambda: store.count(filters, archived=True))
+    pages = max(1, -(-total // page_size))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key="lh_page")
+    page_data = query_page("lh_page_data", filters, None, True, page, page_size, archived=True)
+    st.caption(f"{total} archived leads (page {page} of {pages})")
+    st.dataframe(page_data)
+    export_leads_ui(filters, total, archived=True)
+
+def export_leads_ui(filters, total, archived=False):
+    from lead_export import FORMATS, spool
+
+    st.markdown("#### Download Filtered Leads")
+    col_format, col_build = st.columns([1, 3])
+    fmt = col_format.radio("Format", list(FORMATS), horizontal=True, key="export_format")
+    if not col_build.button(f"Prepare download ({total} leads)", key="export_prepare"):
+        return
+    # The file is built in batches, but st.download_button holds the finished payload in
+    # memory, so it is registered only on the run that prepared it, never on later reruns.
+    # Exports too large for that should use the lead API's streaming GET /leads.csv.
+    mime, suffix = FORMATS[fmt]
+    with spool(store, fmt, filters, archived=archived) as handle:
+        st.download_button(
+            "Download", data=handle, file_name=f"leads_{datetime.date.today().isoformat()}{suffix}",
+            mime=mime, key="export_download",
+        )
+
+def bulk_import_ui():
+    from lead_import import REJECTION_COLUMN, normalize, read_upload, validate_leads
+
+    st.markdown("### Bulk Import Leads")
+    st.markdown("Upload a CSV or Excel file using the same column names as the Leads sheet.")
+    uploaded = st.file_uploader("Upload leads file", type=["csv", "xlsx"], key="bulk_upload")
+    if uploaded is None:
+        return
+
+    raw = uploaded.getvalue()
+    digest = hashlib.sha256(raw).hexdigest()
+    # Validate once per file; later reruns reuse the split.
+    cached = st.session_state.get("bulk_import")
+    if cached is None or cached[0] != digest:
+        leads = normalize(read_upload(uploaded.name, raw))
+        lead_index = get_lead_index(store)
+        accepted, rejected = validate_leads(
+            leads, lambda mobiles: lead_index.known_mobiles(mobiles) | store.archived_mobiles(mobiles)
+        )
+        st.session_state.bulk_import = cached = (digest, accepted, rejected)
+    _, accepted, rejected = cached
+
+    st.markdown(f"**Valid leads:** {len(accepted)}  \n**Rejected rows:** {len(rejected)}")
+    if not rejected.empty:
+        st.markdown("#### Rejections")
+        st.dataframe(rejected[REJECTION_COLUMN].value_counts().rename("Rows"))
+        with st.expander("Rejected rows"):
+            st.dataframe(rejected.head(1000))
+        st.download_button(
+            "Download rejected rows (CSV)",
+            data=rejected.to_csv(index=False).encode("utf-8-sig"),
+            file_name="rejected_leads.csv",
+            mime="text/csv",
+        )
+    if not accepted.empty and st.button(f"Import {len(accepted)} leads", key="bulk_import_button"):
+        store.insert_frame(accepted)
+        del st.session_state.bulk_import
+        st.success(f"{len(accepted)} leads imported successfully!")
 
 def delete_lead_ui(existing_data, display_data):
+    from lead_store import LeadFilter
+
     st.markdown("### Delete Lead")
-    lead_names = display_data["Customer Name"].unique()
-    selected_lead = st.selectbox("Select Lead to Delete", lead_names)
-    if selected_lead:
-        lead_index = display_data[display_data["Customer Name"] == selected_lead].index[0]
+    lead_index = lead_picker("Select Lead to Delete", display_data, LeadFilter(), "delete_lead")
+    if lead_index is not None:
         if st.button("Delete Lead"):
-            existing_data = existing_data.drop(lead_index)
-            update_excel(EXCEL_FILE, SHEET_NAME, existing_data)
+            store.delete(lead_index)
             st.success("Lead deleted successfully!")
-            display_data = existing_data[existing_data["Call status"]!= "Completed"]
 
 def add_user_ui(users):
     st.markdown("### Add New User")
     with st.form(key="add_user_form", clear_on_submit=True):
         username = st.text_input("Username*", placeholder="Enter username")
         password = st.text_input("Password*", type="password", placeholder="Enter password")
-        role = st.selectbox("Role*", options=["admin", "agent", "team leader"])
+        role = st.selectbox("Role*", options=ROLES, format_func=role_label)
+        capacity = st.number_input(CAPACITY_LABEL, min_value=0.1, value=1.0, step=0.1, help=CAPACITY_HELP)
         active = st.checkbox("Active*", value=True)
         submit_button = st.form_submit_button(label="Add User")
         
@@ -260,8 +569,9 @@ def add_user_ui(users):
             elif username in users:
                 st.warning("Username already exists.")
             else:
-                users[username] = {"password": password, "role": role, "active": active}
-                save_user_data(users)
+                directory.save_user(
+                    username, {"password": password, "role": role, "active": active, "capacity": capacity}
+                )
                 st.success("User added successfully!")
 
 def manage_users_ui(users):
@@ -270,58 +580,104 @@ def manage_users_ui(users):
     if username:
         with st.form(key="manage_user_form", clear_on_submit=True):
             password = st.text_input("Password*", value=users[username]["password"], type="password")
-            role = st.selectbox("Role*", options=["admin", "agent"], index=["admin", "agent"].index(users[username]["role"]))
+            current_role = users[username]["role"]
+            role = st.selectbox("Role*", options=ROLES, format_func=role_label,
+                                index=ROLES.index(current_role) if current_role in ROLES else 0)
+            capacity = st.number_input(
+                CAPACITY_LABEL, min_value=0.1, value=float(users[username].get("capacity", 1.0)), step=0.1,
+                help=CAPACITY_HELP,
+            )
             active = st.checkbox("Active*", value=users[username]["active"])
             submit_button = st.form_submit_button(label="Update User")
             if submit_button:
-                users[username] = {"password": password, "role": role, "active": active}
-                save_user_data(users)
+                directory.save_user(
+                    username, {"password": password, "role": role, "active": active, "capacity": capacity}
+                )
                 st.success("User details updated successfully!")
 
 def assign_leads_ui(existing_data, display_data, users):
     st.markdown("### Assign Leads")
-    agents = [user for user, data in users.items() if data["role"] == "agent" and data["active"]]
+    agents = directory.agents()
     leads_to_assign = display_data[display_data["Assigned Agent"].isnull() | (display_data["Assigned Agent"] == "")]
-    if not leads_to_assign.empty:
-        with st.form(key="assign_form", clear_on_submit=True):
-            selected_leads = st.multiselect(
-                "Select Leads to Assign",
-                options=[f"{row['Customer Name']} - {row['Mobile number']} ({row['Business Name']})" for _, row in leads_to_assign.iterrows()],
-                key="leads_multiselect"
-            )
-            selected_agent = st.selectbox("Assign Selected Leads to Agent", [""] + agents, key="agent_select")
-            submit_button = st.form_submit_button(label="Assign Leads")
-            
-            if submit_button and selected_leads and selected_agent:
-                for lead_info in selected_leads:
-                    lead_customer_name = lead_info.split(" - ")[0]
-                    lead_index = leads_to_assign[leads_to_assign["Customer Name"] == lead_customer_name].index[0]
-                    existing_data.at[lead_index, "Assigned Agent"] = selected_agent
-                update_excel(EXCEL_FILE, SHEET_NAME, existing_data)
-                st.success("Selected leads assigned to agent successfully!")
-                # Update the display data
-                display_data = existing_data[existing_data["Call status"] != "Completed"]
-            elif not selected_leads:
-                st.warning("Please select at least one lead to assign.")
-            elif not selected_agent:
-                st.warning("Please select an agent to assign the leads.")
-    else:
+    if leads_to_assign.empty:
         st.info("No unassigned leads available.")
+        return
 
+    mode = st.radio("Assignment mode", ["Manual", "Automatic"], horizontal=True, key="assign_mode")
+    if mode == "Automatic":
+        auto_assign_ui(leads_to_assign, display_data, agents, users)
+        return
+
+    with st.form(key="assign_form", clear_on_submit=True):
+        selected_leads = st.multiselect(
+            "Select Leads to Assign",
+            options=leads_to_assign.index.tolist(),
+            format_func=lambda i: f"{lead_label(leads_to_assign, i)} ({leads_to_assign.at[i, 'Business Name']})",
+            key="leads_multiselect"
+        )
+        selected_agent = st.selectbox("Assign Selected Leads to Agent", [""] + agents, key="agent_select")
+        submit_button = st.form_submit_button(label="Assign Leads")
+
+        if submit_button and selected_leads and selected_agent:
+            store.assign(selected_leads, selected_agent)
+            st.success("Selected leads assigned to agent successfully!")
+        elif submit_button and not selected_leads:
+            st.warning("Please select at least one lead to assign.")
+        elif submit_button and not selected_agent:
+            st.warning("Please select an agent to assign the leads.")
+
+def auto_assign_ui(leads_to_assign, display_data, agents, users):
+    from lead_assignment import LEAST_OPEN, STRATEGIES, plan_assignment
+
+    st.markdown(f"**Unassigned leads:** {len(leads_to_assign)}")
+    with st.form(key="auto_assign_form"):
+        strategy = st.selectbox("Strategy", STRATEGIES, key="assign_strategy")
+        selected_agents = st.multiselect("Agents", agents, default=agents, key="assign_agents")
+        limit = st.number_input(
+            "Leads to assign (0 = all)", min_value=0, max_value=len(leads_to_assign), value=0, step=1, key="assign_limit"
+        )
+        submit_button = st.form_submit_button(label="Distribute Leads")
+    if not submit_button:
+        return
+    if not selected_agents:
+        st.warning("Please select at least one agent.")
+        return
 
-def view_performance_ui(existing_data, users):
+    lead_ids = leads_to_assign.index.to_numpy()
+    if limit:
+        lead_ids = lead_ids[:limit]
+    open_counts = display_data["Assigned Agent"].value_counts().to_dict() if strategy == LEAST_OPEN else None
+    capacities = {agent: users[agent].get("capacity", 1.0) for agent in selected_agents}
+    plan = plan_assignment(lead_ids, selected_agents, strategy, open_counts=open_counts, capacities=capacities)
+    assigned = store.assign_many(plan.to_dict(), only_unassigned=True)
+    st.success(f"{assigned} leads distributed across {len(selected_agents)} agents.")
+    if assigned < len(plan):
+        st.info(f"{len(plan) - assigned} leads were assigned by someone else in the meantime and were skipped.")
+    st.dataframe(plan.value_counts().rename_axis("Agent").rename("Leads assigned"))
+
+
+def performance_window_ui():
+    st.markdown("#### Filter by Date Range")
+    start_date = st.date_input("Start Date", value=datetime.date.today() - datetime.timedelta(days=30))
+    end_date = st.date_input("End Date", value=datetime.date.today())
+    include_undated = st.checkbox("Include leads without a date", value=True)
+    return start_date.isoformat(), end_date.isoformat(), include_undated
+
+def view_performance_ui():
     st.markdown("### View Performance")
-    
-    if users[st.session_state.username]["role"] == "agent":
+    # Aggregates come from the incrementally maintained daily rollup, not a scan of the book.
+    rollup = get_daily_rollup(store)
+
+    role = directory.role(st.session_state.username)
+    if role == "agent":
         agent_name = st.session_state.username
-        agent_data = existing_data[existing_data["Assigned Agent"] == agent_name]
+        start, end, include_undated = performance_window_ui()
+        agent_table = rollup.table(start, end, include_undated)
+        agent_table = agent_table[agent_table["Assigned Agent"] == agent_name]
 
-        st.markdown("#### Filter by Date Range")
-        start_date = st.date_input("Start Date", value=datetime.date.today() - datetime.timedelta(days=30))
-        end_date = st.date_input("End Date", value=datetime.date.today())
-        
-        total_leads = agent_data.shape[0]
-        completed_leads = agent_data[agent_data["Call status"] == "Completed"].shape[0]
+        call_status_counts = agent_table.groupby("Call status")["Leads"].sum().sort_values(ascending=False)
+        total_leads = int(call_status_counts.sum())
+        completed_leads = int(call_status_counts.get("Completed", 0))
         remaining_leads = total_leads - completed_leads
         performance_percentage = (completed_leads / total_leads) * 100 if total_leads > 0 else 0
 
@@ -332,51 +688,81 @@ def view_performance_ui(existing_data, users):
         st.markdown(f"**Performance Percentage:** {performance_percentage:.2f}%")
 
         st.markdown("#### Call Status Breakdown")
-        call_status_counts = agent_data["Call status"].value_counts().to_dict()
         for status, count in call_status_counts.items():
             st.markdown(f"**{status}:** {count} leads")
 
-    elif users[st.session_state.username]["role"] == "team_leader":
-        agent_performance = []
-        agents = [user for user, data in users.items() if data["role"] == "agent" and data["active"]]
-
-        for agent in agents:
-            agent_data = existing_data[existing_data["Assigned Agent"] == agent]
-            total_leads = agent_data.shape[0]
-            completed_leads = agent_data[agent_data["Call status"] == "Completed"].shape[0]
-            remaining_leads = total_leads - completed_leads
-            performance_percentage = (completed_leads / total_leads) * 100 if total_leads > 0 else 0
-
-            agent_performance.append({
-                "Agent": agent,
-                "Total Leads": total_leads,
-                "Completed Leads": completed_leads,
-                "Remaining Leads": remaining_leads,
-                "Performance Percentage": performance_percentage
-            })
-
-        agent_performance = sorted(agent_performance, key=lambda x: x["Performance Percentage"], reverse=True)
+    elif role in ("team_leader", "admin"):
+        agents = directory.agents()
+        start, end, include_undated = performance_window_ui()
+        summary = rollup.agent_summary(start, end, include_undated).reindex(agents, fill_value=0)
+        summary = summary.sort_values("Performance Percentage", ascending=False)
 
         st.markdown("#### Team Performance Summary")
-        for agent in agent_performance:
-            st.markdown(f"**{agent['Agent']}**")
-            st.markdown(f"Total Leads: {agent['Total Leads']}")
-            st.markdown(f"Completed Leads: {agent['Completed Leads']}")
-            st.markdown(f"Remaining Leads: {agent['Remaining Leads']}")
-            st.markdown(f"Performance Percentage: {agent['Performance Percentage']:.2f}%")
+        for agent, row in summary.iterrows():
+            st.markdown(f"**{agent}**")
+            st.markdown(f"Total Leads: {row['Total Leads']}")
+            st.markdown(f"Completed Leads: {row['Completed Leads']}")
+            st.markdown(f"Remaining Leads: {row['Remaining Leads']}")
+            st.markdown(f"Performance Percentage: {row['Performance Percentage']:.2f}%")
             st.markdown("---")
 
-        performance_df = pd.DataFrame(agent_performance)
+        performance_df = summary.rename_axis("Agent").reset_index()
         st.dataframe(performance_df)
 
-def my_leads_ui(display_data):
+        lead_funnel_ui()
+
+@st.cache_resource(max_entries=1)
+def get_funnel_tables(_events, signature):
+    # Recomputed only when the event log file changes (keyed by its signature).
+    from lead_events import funnel, time_in_status, time_to_complete, transition_counts
+
+    events = _events.load()
+    if not len(events):
+        return None
+    return funnel(events), transition_counts(events), time_in_status(events), time_to_complete(events)
+
+def lead_funnel_ui():
+    from lead_cache import file_signature
+
+    st.markdown("#### Lead Funnel")
+    tables = get_funnel_tables(store.events, file_signature(store.events.path))
+    if tables is None:
+        st.info("No status changes recorded yet.")
+        return
+    funnel, transitions, in_status, hours = tables
+    st.bar_chart(funnel)
+    st.markdown("##### Status Transitions")
+    st.dataframe(transitions)
+    st.markdown("##### Time in Status")
+    st.dataframe(in_status)
+    if len(hours):
+        st.markdown(
+            f"**Time to complete:** median {hours.median():.1f} h, "
+            f"p90 {hours.quantile(0.9):.1f} h over {len(hours)} leads"
+        )
+
+def my_leads_ui(existing_data):
     st.markdown("### My Leads")
-    agent_leads = display_data[display_data["Assigned Agent"] == st.session_state.username]
-    st.dataframe(agent_leads)
+    st.dataframe(get_agent_leads(existing_data, st.session_state.username))
+
 
+@st.cache_resource
+def get_report_cache():
+    # Shared by every session: a receipt scanned once is never re-analysed.
+    from fraud_cache import ReportCache
+
+    return ReportCache(max_items=64, disk_dir=FRAUD_CACHE_DIR)
+
+@st.cache_resource
+def get_fraud_jobs():
+    from fraud_jobs import JobManager
+
+    return JobManager(get_report_cache())
 
 def fraud_detection_ui():
     import fraud_detector
+    from fraud_jobs import DONE, FAILED
+    from PIL import Image
 
     st.markdown("## Receipt Fraud Detection")
     st.markdown(
@@ -402,8 +788,26 @@ def fraud_detection_ui():
         st.markdown("**Original Image**")
         st.image(img, use_column_width=True)
 
-    with st.spinner("Analyzing image for tampering…"):
-        report = fraud_detector.analyze(raw)
+    # The scan runs in the worker pool; this session only polls for its status.
+    jobs = get_fraud_jobs()
+    job_id = jobs.submit(raw)
+    status = jobs.status(job_id)
+    if status.state == FAILED:
+        with col_ela:
+            st.error(f"Analysis failed: {status.error}")
+            if st.button("Retry analysis", key="fraud_retry"):
+                jobs.forget(job_id)
+                st.experimental_rerun()
+        return
+    if status.state != DONE:
+        with col_ela:
+            stage = status.stage or "waiting for a free worker"
+            st.info(f"Analyzing image for tampering… ({stage})")
+            done_stages = fraud_detector.STAGES.index(status.stage) if status.stage in fraud_detector.STAGES else 0
+            st.progress(done_stages / len(fraud_detector.STAGES))
+        st.caption("You can switch to another view; the report will be ready when you come back.")
+        return True  # poll again
+    report = status.report
 
     with col_ela:
         st.markdown("**Error Level Analysis (ELA)**")
@@ -447,12 +851,91 @@ def fraud_detection_ui():
         "Always consult your bank or a certified forensic expert for official verification."
     )
 
+def fraud_batch_ui():
+    from fraud_batch import expand_uploads, result_row, results_frame, to_csv, to_xlsx
+    from fraud_jobs import DONE, FAILED, QUEUED, RUNNING
+
+    st.markdown("## Batch Receipt Scan")
+    st.markdown("Upload several receipt images, or a ZIP archive of them. Scans run in parallel across the server's cores.")
+    uploads = st.file_uploader(
+        "Upload receipts (JPEG, PNG or ZIP)",
+        type=["jpg", "jpeg", "png", "zip"],
+        accept_multiple_files=True,
+        key="fraud_batch_upload",
+    )
+    if not uploads:
+        st.info("No files uploaded yet.")
+        return
+
+    # Expand and submit once per upload set; reruns only poll the jobs.
+    upload_key = tuple((f.name, f.size) for f in uploads)
+    batch = st.session_state.get("fraud_batch")
+    if batch is None or batch[0] != upload_key:
+        jobs = get_fraud_jobs()
+        images = expand_uploads([(f.name, f.getvalue()) for f in uploads])
+        batch = (upload_key, [(name, jobs.submit(data)) for name, data in images])
+        st.session_state.fraud_batch = batch
+    submitted = batch[1]
+    if not submitted:
+        st.warning("No JPEG or PNG images found in the upload.")
+        return
+
+    jobs = get_fraud_jobs()
+    results = results_frame([result_row(name, jobs.status(job_id)) for name, job_id in submitted])
+    finished = int(results["Status"].isin([DONE, FAILED]).sum())
+    st.progress(finished / len(results))
+    st.markdown(f"**Scanned:** {finished} of {len(results)}")
+    st.dataframe(results, use_container_width=True)
+
+    col_csv, col_xlsx = st.columns(2)
+    col_csv.download_button("Export CSV", data=to_csv(results), file_name="receipt_scan.csv", mime="text/csv")
+    col_xlsx.download_button(
+        "Export Excel",
+        data=to_xlsx(results),
+        file_name="receipt_scan.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+    return bool(results["Status"].isin([QUEUED, RUNNING]).any())  # poll again while scans are pending
+
+def perf_metrics_ui():
+    import pandas as pd
+
+    st.markdown("### Performance Metrics")
+    if directory.role(st.session_state.username) != "admin":
+        st.warning("Only admins can view performance metrics.")
+        return
+    registry = perf_metrics.REGISTRY
+    st.caption(
+        f"Rolling window of the last {registry.window} samples per timer, collected by this server process "
+        f"since {datetime.datetime.fromtimestamp(registry.started):%Y-%m-%d %H:%M}."
+    )
+    summary = pd.DataFrame(registry.summary())
+    if summary.empty:
+        st.info("No timings recorded yet.")
+    else:
+        st.dataframe(summary.set_index("name"))
+    col_dump, col_reset = st.columns(2)
+    col_dump.download_button(
+        "Download JSON", data=registry.dump(), file_name=f"portal_timings_{int(time.time())}.json",
+        mime="application/json", key="perf_dump",
+    )
+    if col_reset.button("Reset timings", key="perf_reset"):
+        registry.reset()
+        st.experimental_rerun()
+
+# Views that open the lead store, and the subset that also needs the full snapshot.
+STORE_VIEWS = {
+    "dashboard", "onboard", "update", "view_all", "lead_history", "bulk_import", "delete", "assign_leads", "view_performance",
+    "my_leads",
+}
+SNAPSHOT_VIEWS = {"update", "bulk_import", "delete", "assign_leads", "view_performance", "my_leads"}
+
 # Main execution flow
-users = load_user_data()
-existing_data = read_excel(EXCEL_FILE, SHEET_NAME, COLUMNS)
-existing_data["Customer Name"] = existing_data["Customer Name"].astype(str)
-existing_data["Mobile number"] = existing_data["Mobile number"].astype(str)
-display_data = get_filtered_data(existing_data, "Completed")
+directory = get_user_directory()
+users = directory.users()
+if _profile:
+    _profile.mark("users")
 
 st.sidebar.title("Menu")
 if "logged_in" not in st.session_state:
@@ -464,34 +947,56 @@ if not st.session_state.logged_in:
     login_ui()
 else:
     logout_ui()
-    navigation_ui(users[st.session_state.username]["role"])
+    navigation_ui(directory.role(st.session_state.username))
 
 query_params = st.experimental_get_query_params()
 view = query_params.get("view", ["dashboard"])[0]
 
 if st.session_state.logged_in:
-    if view == "dashboard":
-        dashboard_ui()
-    elif view == "onboard":
-        onboard_lead_ui(existing_data)
-    elif view == "update":
-        update_lead_ui(existing_data, display_data)
-    elif view == "view_all":
-        view_all_leads_ui(display_data)
-    elif view == "delete":
-        delete_lead_ui(existing_data, display_data)
-    elif view == "add_user":
-        add_user_ui(users)
-    elif view == "manage_users":
-        manage_users_ui(users)
-    elif view == "assign_leads":
-        assign_leads_ui(existing_data, display_data, users)
-    elif view == "view_performance":
-        view_performance_ui(existing_data, users)
-    elif view == "my_leads":
-        my_leads_ui(display_data)
-    elif view == "fraud_detection":
-        fraud_detection_ui()
+    if view in STORE_VIEWS:
+        store = get_store()
+    if view in SNAPSHOT_VIEWS:
+        # The snapshot holds open leads only; completed ones live in the archive.
+        existing_data = display_data = load_leads(store)
+    if _profile:
+        _profile.mark("data")
+
+    poll = False
+    with perf_metrics.timer(f"view.{view}"):
+        if view == "dashboard":
+            dashboard_ui()
+        elif view == "onboard":
+            onboard_lead_ui()
+        elif view == "update":
+            update_lead_ui(existing_data)
+        elif view == "view_all":
+            view_all_leads_ui()
+        elif view == "lead_history":
+            lead_history_ui()
+        elif view == "bulk_import":
+            bulk_import_ui()
+        elif view == "delete":
+            delete_lead_ui(existing_data, display_data)
+        elif view == "add_user":
+            add_user_ui(users)
+        elif view == "manage_users":
+            manage_users_ui(users)
+        elif view == "assign_leads":
+            assign_leads_ui(existing_data, display_data, users)
+        elif view == "view_performance":
+            view_performance_ui()
+        elif view == "my_leads":
+            my_leads_ui(existing_data)
+        elif view == "fraud_detection":
+            poll = fraud_detection_ui()
+        elif view == "fraud_batch":
+            poll = fraud_batch_ui()
+        elif view == "perf_metrics":
+            perf_metrics_ui()
+    if poll:
+        # Waiting on fraud jobs: sleep outside the timer so view.* measures rendering, not the poll interval.
+        time.sleep(FRAUD_POLL_SECONDS)
+        st.experimental_rerun()
 else:
     st.sidebar.markdown("Please login to access the portal.")
 
@@ -504,3 +1009,10 @@ st.sidebar.info(
     Agents can update the status of their assigned leads and onboard new leads.
     """
 )
+
+if _profile:
+    _profile.mark(f"render ({view if st.session_state.logged_in else 'login'})")
+    report = _profile.report()
+    print(report, file=sys.stderr)
+    with st.sidebar.expander("Startup profile"):
+        st.code(report)
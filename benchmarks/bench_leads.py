@@ -0,0 +1,235 @@
+"""
+Benchmarks for the leads data layer on synthetic books.
+
+Generates Database.xlsx-style workbooks with the real COLUMNS schema (cached
+under benchmarks/.data), then times the legacy Excel load, the SQLite
+migration, the shared snapshot (open leads in categorical dtypes) and its
+journal replay, single-lead updates, the agent / status filters, bulk
+assignment, the performance aggregation and the dashboard counters. Every
+step also records its tracemalloc peak. Results are written as JSON so a later storage
+change can be compared against a saved baseline:
+
+    python benchmarks/bench_leads.py --sizes 10000 100000 --out benchmarks/results/baseline.json
+    python benchmarks/bench_leads.py --sizes 10000 100000 --baseline benchmarks/results/baseline.json
+
+tracemalloc only sees Python allocations and slows allocation-heavy steps
+somewhat; pass --no-memory for pure timings.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lead_assignment import LEAST_OPEN, plan_assignment  # noqa: E402
+from lead_cache import LeadSnapshot  # noqa: E402
+from lead_index import LeadIndex, rows  # noqa: E402
+from lead_metrics import ArchiveCounts, DailyRollup, LeadCounters  # noqa: E402
+from lead_schema import BUSINESS_TYPES, CALL_STATUSES, COLUMNS  # noqa: E402
+from lead_store import LeadStore  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+AGENTS = [f"agent{i:02d}" for i in range(20)]
+UPDATES = 200
+REGRESSION_RATIO = 1.25
+
+
+# ── Synthetic books ──────────────────────────────────────────────────────────
+
+def synthetic_leads(n: int, seed: int = 0) -> pd.DataFrame:
+    """`n` leads with realistic value distributions; a fifth are unassigned."""
+    rng = np.random.default_rng(seed)
+    first = np.array(["Ahmed", "Mohamed", "Sara", "Mona", "Youssef", "Omar", "Nour", "Hassan", "Aya", "Karim"])
+    last = np.array(["Ali", "Hassan", "Ibrahim", "Mahmoud", "Saleh", "Fathy", "Kamal", "Adel", "Nabil", "Samir"])
+    govs = np.array(["Cairo", "Giza", "Alexandria", "Gharbia", "Dakahlia", "Sharqia"])
+    days = pd.date_range(end=datetime.date.today(), periods=365).strftime("%Y-%m-%d").to_numpy()
+    agents = np.array(AGENTS + [""] * (len(AGENTS) // 4))
+    df = pd.DataFrame({column: "" for column in COLUMNS}, index=range(n))
+    df["Customer Name"] = np.char.add(np.char.add(rng.choice(first, n), " "), rng.choice(last, n))
+    df["Mobile number"] = np.char.add("01", np.char.zfill(rng.integers(0, 10 ** 9, n).astype(str), 9))
+    df["Business Name"] = np.char.add(rng.choice(last, n), " Trading")
+    df["Business type"] = rng.choice(BUSINESS_TYPES, n)
+    df["GOV"] = rng.choice(govs, n)
+    df["City"] = df["GOV"]
+    df["Call status"] = rng.choice(CALL_STATUSES, n, p=_status_weights())
+    df["Assigned Agent"] = rng.choice(agents, n)
+    df["Date"] = rng.choice(days, n)
+    df["Lead Source"] = rng.choice(["Facebook", "Referral", "Walk-in", "Website"], n)
+    df["Tax registered (electronic invoices)"] = rng.choice(["Yes", "No"], n)
+    return df[COLUMNS]
+
+
+def _status_weights() -> list[float]:
+    weights = np.ones(len(CALL_STATUSES))
+    if "Completed" in CALL_STATUSES:
+        weights[CALL_STATUSES.index("Completed")] = 3
+    return list(weights / weights.sum())
+
+
+def synthetic_book(n: int) -> str:
+    """Path of a cached Database.xlsx-style workbook with `n` leads (built on first use)."""
+    from openpyxl import Workbook
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"leads_{n}.xlsx")
+    if not os.path.exists(path):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Leads")
+        sheet.append(COLUMNS)
+        for row in synthetic_leads(n).itertuples(index=False):
+            sheet.append(list(row))
+        workbook.save(path)
+    return path
+
+
+# ── Measurement ──────────────────────────────────────────────────────────────
+
+class Run:
+    """Collects {step: {seconds, peak_mb}} for one book size."""
+
+    def __init__(self, memory: bool):
+        self.memory = memory
+        self.results: dict[str, dict] = {}
+
+    def step(self, name: str, fn, *args):
+        if self.memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = fn(*args)
+        seconds = time.perf_counter() - start
+        entry = {"seconds": round(seconds, 6)}
+        if self.memory:
+            entry["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+        self.results[name] = entry
+        print(f"  {name:<28} {seconds * 1000:10.1f} ms" + (f"  {entry['peak_mb']:8.1f} MB" if self.memory else ""))
+        return value
+
+
+def bench_size(n: int, memory: bool, workdir: str) -> dict:
+    print(f"{n} leads")
+    book = synthetic_book(n)
+    run = Run(memory)
+
+    excel = run.step("load.read_excel", lambda: pd.read_excel(book, sheet_name="Leads", dtype=str))
+    store = LeadStore(os.path.join(workdir, f"bench_{n}.db"))
+    run.step("load.migrate", store.import_frame, excel)
+    del excel
+    # The snapshot holds open leads only (completed ones are archived), encoded as categoricals.
+    snapshot = LeadSnapshot(store, poll_interval=float("inf"))
+    _, frame = run.step("load.snapshot_open", snapshot.read)
+
+    rng = np.random.default_rng(1)
+    targets = rng.choice(frame.index.to_numpy(), UPDATES, replace=False)
+
+    def single_updates():
+        for lead_id in targets:
+            store.update(int(lead_id), {"Call status": CALL_STATUSES[0], "Comment": "benchmark"})
+
+    run.step(f"update.single_x{UPDATES}", single_updates)
+    run.results[f"update.single_x{UPDATES}"]["per_call_ms"] = round(
+        run.results[f"update.single_x{UPDATES}"]["seconds"] / UPDATES * 1000, 3
+    )
+
+    run.step("load.replay_updates", snapshot.read)
+    run.step("filter.pending", lambda: frame[frame["Call status"] == CALL_STATUSES[0]])
+    index = LeadIndex()
+    run.step("filter.index_build_open", index.rebuild, frame)
+    run.step("filter.agent_leads_open", lambda: [rows(frame, index.agent_leads(a)) for a in AGENTS])
+
+    unassigned = frame.index[frame["Assigned Agent"] == ""]
+    open_counts = frame.groupby("Assigned Agent", observed=True).size().to_dict()
+    plan = run.step("assign.plan", plan_assignment, unassigned, AGENTS, LEAST_OPEN, open_counts)
+    run.step("assign.write", store.assign_many, plan.to_dict(), True)
+
+    rollup = DailyRollup(ArchiveCounts(store))
+    run.step("aggregate.rollup_build_open", rollup.rebuild, frame)
+    run.step("aggregate.agent_summary", rollup.agent_summary)
+    run.step("aggregate.groupby_scan_open",
+             lambda: frame.groupby(["Assigned Agent", "Call status"], observed=True).size())
+    run.step("aggregate.dashboard_totals", LeadCounters(store).totals, datetime.date.today().isoformat())
+    return run.results
+
+
+# ── Results ──────────────────────────────────────────────────────────────────
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+        "pandas": pd.__version__, "numpy": np.__version__, "sqlite": sqlite3.sqlite_version,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_RATIO) -> list[str]:
+    """Print current vs baseline per step; returns the steps slower than `threshold` x baseline."""
+    regressions = []
+    if current["environment"].get("memory_tracking") != baseline.get("environment", {}).get("memory_tracking"):
+        print("\nWarning: baseline and current run differ in --no-memory; timings are not comparable.")
+    print(f"\n{'size':>8} {'step':<28} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for size, steps in current["sizes"].items():
+        for step, entry in steps.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(step)
+            if not base:
+                continue
+            ratio = entry["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            flag = "  <-- slower" if ratio > threshold else ""
+            print(f"{size:>8} {step:<28} {base['seconds'] * 1000:9.1f}ms {entry['seconds'] * 1000:9.1f}ms "
+                  f"{ratio:6.2f}x{flag}")
+            if flag:
+                regressions.append(f"{size}:{step}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--out", help="results JSON (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO,
+                        help="slowdown ratio reported as a regression")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak tracking")
+    args = parser.parse_args(argv)
+
+    results = {"environment": {**environment(), "memory_tracking": not args.no_memory}, "sizes": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            results["sizes"][str(n)] = bench_size(n, not args.no_memory, workdir)
+
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                   f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nResults written to {out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} step(s) regressed beyond {args.threshold:.2f}x: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Helpers for scanning many receipts at once.
+Uploads (loose images or ZIP archives) are expanded into individual images,
+submitted to the fraud JobManager, and summarised one row per receipt.
+"""
+
+import io
+import os
+import zipfile
+
+import pandas as pd
+
+from fraud_jobs import DONE, FAILED
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+RESULT_COLUMNS = ["File", "Status", "Risk Score", "Verdict", "Top Finding"]
+
+_SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2, "ok": 3}
+
+
+def expand_uploads(files: list[tuple[str, bytes]]) -> list[tuple[str, bytes]]:
+    """Flatten uploaded images and ZIP archives into (name, image bytes) pairs."""
+    images = []
+    for name, data in files:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    base = os.path.basename(member.filename)
+                    if member.is_dir() or base.startswith(".") or not base.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    images.append((member.filename, archive.read(member)))
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            images.append((name, data))
+    return images
+
+
+def top_finding(report) -> str:
+    worst = min(report.findings, key=lambda f: _SEVERITY_ORDER.get(f.severity, 9), default=None)
+    if worst is None or worst.severity == "ok":
+        return "No issues found"
+    return f"{worst.label} ({worst.severity})"
+
+
+def result_row(name: str, status) -> dict:
+    row = {"File": name, "Status": status.state, "Risk Score": None, "Verdict": "", "Top Finding": ""}
+    if status.state == DONE:
+        report = status.report
+        row.update({"Risk Score": report.risk_score, "Verdict": report.verdict, "Top Finding": top_finding(report)})
+    elif status.state == FAILED:
+        row["Top Finding"] = status.error
+    else:
+        row["Top Finding"] = status.stage
+    return row
+
+
+def results_frame(rows: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    return df.sort_values("Risk Score", ascending=False, na_position="last", kind="stable")
+
+
+def to_csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def to_xlsx(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Receipt Scan", index=False)
+    return buf.getvalue()
@@ -0,0 +1,65 @@
+"""
+Content-addressed cache of fraud reports.
+Reports are keyed by the SHA-256 of the uploaded bytes, held in an LRU in
+memory and optionally mirrored to disk, so the same receipt is analysed once
+no matter how many reruns or sessions ask for it.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from safe_io import atomic_write
+
+
+def content_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ReportCache:
+    """LRU of FraudReport objects with an optional on-disk tier."""
+
+    def __init__(self, max_items: int = 64, disk_dir: Optional[str] = None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as handle:
+                report = pickle.load(handle)
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            return None
+        self._remember(key, report)
+        return report
+
+    def put(self, key: str, report):
+        self._remember(key, report)
+        if self.disk_dir:
+            def write(tmp_path):
+                with open(tmp_path, "wb") as handle:
+                    pickle.dump(report, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+            atomic_write(self._disk_path(key), write)
+
+    def _remember(self, key: str, report):
+        with self._lock:
+            self._items[key] = report
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
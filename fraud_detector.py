@@ -8,7 +8,7 @@ import math
 import struct
 import zlib
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Callable, Optional
 import numpy as np
 from PIL import Image, ImageChops, ImageEnhance, ImageFilter
 
@@ -220,7 +220,12 @@ def _jpeg_ghost(img: Image.Image) -> float:
 
 # ── Main entry point ──────────────────────────────────────────────────────────
 
-def analyze(image_bytes: bytes) -> FraudReport:
+STAGES = ["Error Level Analysis", "Noise Pattern", "Clone Detection", "JPEG Re-Save", "JPEG Ghost", "Metadata"]
+
+
+def analyze(image_bytes: bytes, progress: Optional[Callable[[str], None]] = None) -> FraudReport:
+    """Run every check on the image. `progress`, if given, is called with each stage name as it starts."""
+    report_stage = progress or (lambda stage: None)
     np.random.seed(42)
     findings: list[Finding] = []
     risk = 0
@@ -229,6 +234,7 @@ def analyze(image_bytes: bytes) -> FraudReport:
     is_jpeg = img.format in ("JPEG", "JPG") or image_bytes[:2] == b"\xff\xd8"
 
     # ── 1. ELA ────────────────────────────────────────────────────────────────
+    report_stage(STAGES[0])
     ela_img, ela_mean = _ela(img)
     ela_arr = np.array(ela_img, dtype=np.float32)
     ela_var = _ela_region_variance(ela_arr)
@@ -261,6 +267,7 @@ def analyze(image_bytes: bytes) -> FraudReport:
     findings.append(ela_finding)
 
     # ── 2. Noise analysis ─────────────────────────────────────────────────────
+    report_stage(STAGES[1])
     noise_img, noise_std = _noise_map(img)
     noise_reg_var = _noise_region_variance(img)
 
@@ -288,6 +295,7 @@ def analyze(image_bytes: bytes) -> FraudReport:
         ))
 
     # ── 3. Clone / copy-paste ─────────────────────────────────────────────────
+    report_stage(STAGES[2])
     clone = _clone_score(img)
     if clone > 0.08:
         findings.append(Finding(
@@ -314,6 +322,7 @@ def analyze(image_bytes: bytes) -> FraudReport:
 
     # ── 4. JPEG double-save / quantisation tables ─────────────────────────────
     if is_jpeg:
+        report_stage(STAGES[3])
         ds = _double_save_score(image_bytes)
         if ds > 0:
             findings.append(Finding(
@@ -331,6 +340,7 @@ def analyze(image_bytes: bytes) -> FraudReport:
             ))
 
         # ── 5. JPEG ghost ──────────────────────────────────────────────────────
+        report_stage(STAGES[4])
         ghost = _jpeg_ghost(img)
         if ghost > 0.65:
             findings.append(Finding(
@@ -357,6 +367,7 @@ def analyze(image_bytes: bytes) -> FraudReport:
             ))
 
     # ── 6. Metadata ───────────────────────────────────────────────────────────
+    report_stage(STAGES[5])
     meta = _parse_metadata(img, image_bytes)
     sw = meta.get("software", "")
     suspicious_sw = ["photoshop", "gimp", "paint", "snapseed", "lightroom",
@@ -0,0 +1,106 @@
+"""
+Background execution of fraud scans.
+Analyses run in a process pool so the Streamlit session stays responsive and
+several scans use several cores. Jobs are identified by the content hash of
+the image, so the same receipt submitted twice shares one job and results
+land in the shared ReportCache.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import perf_metrics
+from fraud_cache import ReportCache, content_key
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class JobStatus:
+    state: str
+    stage: str = ""
+    report: object = None
+    error: str = ""
+
+
+def _run(job_id: str, image_bytes: bytes, stages):
+    """Worker entry point: the report plus (stage, seconds) timings for the parent to record."""
+    import fraud_detector
+
+    marks = [("", time.perf_counter())]
+
+    def progress(stage):
+        stages[job_id] = stage
+        marks.append((stage, time.perf_counter()))
+
+    report = fraud_detector.analyze(image_bytes, progress=progress)
+    marks.append(("", time.perf_counter()))
+    timings = [(stage, end - start) for (stage, start), (_, end) in zip(marks[1:-1], marks[2:])]
+    timings.append(("total", marks[-1][1] - marks[0][1]))
+    return report, timings
+
+
+class JobManager:
+    """Submits scans to a process pool and reports their progress."""
+
+    def __init__(self, cache: ReportCache, max_workers: Optional[int] = None):
+        self.cache = cache
+        # Spawn, not fork: forking the threaded Streamlit server can copy locks held by other threads.
+        context = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        self._manager = context.Manager()
+        self._stages = self._manager.dict()  # job id -> current stage, written by workers
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, image_bytes: bytes) -> str:
+        """Queue a scan (unless cached or already running) and return its job id."""
+        job_id = content_key(image_bytes)
+        with self._lock:
+            if job_id in self._futures or self.cache.get(job_id) is not None:
+                return job_id
+            future = self._executor.submit(_run, job_id, image_bytes, self._stages)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def _finish(self, job_id: str, future: Future):
+        if future.exception() is None:
+            report, timings = future.result()
+            for stage, seconds in timings:
+                perf_metrics.record(f"fraud.{stage}" if stage == "total" else f"fraud.stage.{stage}", seconds)
+            self.cache.put(job_id, report)
+            with self._lock:
+                # The report now lives in the cache; keep failed futures so their error can be shown.
+                self._futures.pop(job_id, None)
+        self._stages.pop(job_id, None)
+
+    def status(self, job_id: str) -> JobStatus:
+        report = self.cache.get(job_id)
+        if report is not None:
+            return JobStatus(DONE, report=report)
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is None:
+            return JobStatus(FAILED, error="Unknown job.")
+        if future.done():
+            error = future.exception()
+            if error is not None:
+                return JobStatus(FAILED, error=str(error))
+            return JobStatus(DONE, report=future.result()[0])
+        stage = self._stages.get(job_id, "")
+        return JobStatus(RUNNING if stage else QUEUED, stage=stage)
+
+    def forget(self, job_id: str):
+        """Drop a finished or failed job so it can be resubmitted."""
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is not None and future.done():
+                del self._futures[job_id]
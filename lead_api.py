@@ -0,0 +1,194 @@
+"""
+Local HTTP ingestion API for leads.
+Dialers and web forms post batches here instead of going through the
+Streamlit forms; each batch is validated with the bulk import rules and
+committed to the shared SQLite store in one transaction, so the portal's
+snapshot picks it up from the journal like any other write.
+
+    python lead_api.py --port 8502
+
+Endpoints (bodies are a JSON array, a single JSON object, or JSON Lines):
+
+    POST /leads      new leads, keyed by COLUMNS
+    POST /updates    field/status updates, each with the lead "id"
+    GET  /leads.csv  streaming CSV export (?status=...&agent=...&archived=1)
+    GET  /health     store version
+
+Write responses report the committed ids and the rejected records with the
+first failing rule, e.g. {"inserted": [...], "rejected": [{"index": 3, "reason": ...}]}.
+"""
+
+import argparse
+import json
+import sys
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import perf_metrics
+from lead_events import EventLog
+from lead_export import csv_chunks
+from lead_import import REJECTION_COLUMN, normalize, validate_leads, validate_updates
+from lead_store import LeadFilter, LeadStore
+
+DB_FILE = "leads.db"
+EVENTS_FILE = "lead_events.bin"
+MAX_BODY = 64 * 1024 * 1024
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_records(body: bytes) -> list[dict]:
+    """Records from a JSON array/object or JSON Lines body."""
+    text = body.decode("utf-8-sig").strip()
+    if not text:
+        return []
+    if text[0] not in "[{":
+        raise BadRequest("Body must be a JSON array, object or JSON Lines")
+    try:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            # More than one top-level value: JSON Lines.
+            data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except json.JSONDecodeError as exc:
+        raise BadRequest(f"Invalid JSON: {exc}") from None
+    records = data if isinstance(data, list) else [data]
+    if not all(isinstance(record, dict) for record in records):
+        raise BadRequest("Every record must be a JSON object")
+    return records
+
+
+class LeadIngestor:
+    """Validates and commits batches; batches are serialised so mobile deduplication sees earlier ones."""
+
+    def __init__(self, store: LeadStore):
+        self.store = store
+        self._lock = threading.Lock()
+
+    def add_leads(self, records: list[dict]) -> dict:
+        frame = pd.DataFrame.from_records(records, index=range(len(records)))
+        with self._lock:
+            accepted, rejected = validate_leads(normalize(frame), self.store.known_mobiles)
+            ids = self.store.insert_frame(accepted)
+        return {
+            "inserted": ids,
+            "rejected": [{"index": int(i), "reason": reason} for i, reason in rejected[REJECTION_COLUMN].items()],
+        }
+
+    def update_leads(self, records: list[dict]) -> dict:
+        updates, rejected = validate_updates(records)
+        with self._lock:
+            updated = set(self.store.update_many(updates))
+        missing = updates.keys() - updated
+        invalid = {position for position, _ in rejected}
+        rejected += [
+            (position, "Unknown lead id")
+            for position, record in enumerate(records)
+            if position not in invalid and int(record["id"]) in missing
+        ]
+        return {
+            "updated": sorted(updated),
+            "rejected": [{"index": i, "reason": reason} for i, reason in sorted(rejected)],
+        }
+
+
+def make_handler(ingestor: LeadIngestor):
+    store = ingestor.store
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                self._json(HTTPStatus.OK, {"version": store.version()})
+            elif url.path == "/leads.csv":
+                self._export(parse_qs(url.query))
+            else:
+                self._json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            routes = {"/leads": ingestor.add_leads, "/updates": ingestor.update_leads}
+            if path not in routes:
+                self._json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._json(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"})
+                self.close_connection = True
+                return
+            if length > MAX_BODY:
+                self._json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"Body over {MAX_BODY} bytes"})
+                self.close_connection = True
+                return
+            try:
+                records = parse_records(self.rfile.read(length))
+            except (BadRequest, UnicodeDecodeError) as exc:
+                self._json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+                return
+            with perf_metrics.timer(f"api.{path.strip('/')}"):
+                result = routes[path](records)
+            self._json(HTTPStatus.OK, result)
+
+        def _export(self, query: dict):
+            agent = query.get("agent", [None])[0]
+            filters = LeadFilter(statuses=query.get("status", []), agent=agent)
+            archived = query.get("archived", ["0"])[0] in ("1", "true", "yes")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in csv_chunks(store, filters, archived=archived):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _json(self, status: HTTPStatus, payload: dict):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # request timings go to perf_metrics instead
+
+    return Handler
+
+
+def serve(store: LeadStore, host: str = "127.0.0.1", port: int = 8502) -> ThreadingHTTPServer:
+    """Build (but do not start) the API server around `store`."""
+    return ThreadingHTTPServer((host, port), make_handler(LeadIngestor(store)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1", help="bind address (default: local only)")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--events", default=EVENTS_FILE)
+    args = parser.parse_args(argv)
+
+    server = serve(LeadStore(args.db, events=EventLog(args.events)), args.host, args.port)
+    print(f"Lead API listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
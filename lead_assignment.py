@@ -0,0 +1,79 @@
+"""
+Automatic distribution of unassigned leads across agents.
+Every strategy computes per-agent quotas with numpy and returns the whole
+lead -> agent plan at once, ready for a single batched write.
+"""
+
+import numpy as np
+import pandas as pd
+
+ROUND_ROBIN = "Round robin"
+LEAST_OPEN = "Least open leads"
+CAPACITY_WEIGHTED = "Capacity weighted"
+STRATEGIES = [ROUND_ROBIN, LEAST_OPEN, CAPACITY_WEIGHTED]
+
+
+def _apportion(weights: np.ndarray, n: int) -> np.ndarray:
+    """Split n items proportionally to `weights` (largest remainder method)."""
+    weights = np.asarray(weights, dtype=float)
+    if weights.sum() <= 0:
+        weights = np.ones_like(weights)
+    exact = weights / weights.sum() * n
+    quotas = np.floor(exact).astype(int)
+    remainder = n - quotas.sum()
+    if remainder:
+        quotas[np.argsort(-(exact - quotas), kind="stable")[:remainder]] += 1
+    return quotas
+
+
+def _level(loads: np.ndarray, n: int) -> np.ndarray:
+    """Quotas that bring every agent as close as possible to the same open-lead count."""
+    order = np.argsort(loads, kind="stable")
+    sorted_loads = loads[order].astype(float)
+    # Water-filling: find how many of the least loaded agents get topped up.
+    cumulative = np.cumsum(sorted_loads)
+    counts = np.arange(1, len(loads) + 1)
+    levels = (cumulative + n) / counts
+    filled = np.nonzero(levels >= sorted_loads)[0][-1] + 1
+    level = levels[filled - 1]
+    quotas = np.zeros(len(loads), dtype=int)
+    quotas[order[:filled]] = np.floor(level - sorted_loads[:filled]).astype(int)
+    remainder = n - quotas.sum()
+    if remainder:
+        # Hand leftovers to the agents that are still lowest after topping up.
+        after = loads + quotas
+        quotas[np.argsort(after, kind="stable")[:remainder]] += 1
+    return quotas
+
+
+def _interleave(agents: np.ndarray, quotas: np.ndarray) -> np.ndarray:
+    """Spread each agent's quota evenly through the lead order (oldest leads are shared out)."""
+    owners = np.repeat(np.arange(len(agents)), quotas)
+    rank = np.concatenate([(np.arange(q) + 0.5) / q for q in quotas if q]) if quotas.sum() else np.empty(0)
+    return agents[owners[np.argsort(rank, kind="stable")]]
+
+
+def plan_assignment(lead_ids, agents: list[str], strategy: str = ROUND_ROBIN,
+                    open_counts: dict = None, capacities: dict = None) -> pd.Series:
+    """
+    Lead id -> agent for `lead_ids` (in the order given, typically oldest first).
+    `open_counts` feeds LEAST_OPEN; `capacities` (relative weights, default 1)
+    feeds CAPACITY_WEIGHTED.
+    """
+    lead_ids = np.asarray(lead_ids)
+    if not agents or not len(lead_ids):
+        return pd.Series([], index=lead_ids[:0], dtype=object)
+    names = np.asarray(agents, dtype=object)
+    n = len(lead_ids)
+
+    if strategy == ROUND_ROBIN:
+        plan = names[np.arange(n) % len(names)]
+    elif strategy == LEAST_OPEN:
+        loads = np.array([(open_counts or {}).get(a, 0) for a in agents])
+        plan = _interleave(names, _level(loads, n))
+    elif strategy == CAPACITY_WEIGHTED:
+        weights = np.array([(capacities or {}).get(a, 1.0) for a in agents])
+        plan = _interleave(names, _apportion(weights, n))
+    else:
+        raise ValueError(f"Unknown assignment strategy: {strategy}")
+    return pd.Series(plan, index=lead_ids, dtype=object)
@@ -0,0 +1,167 @@
+"""
+Process-wide caches for data that is expensive to parse.
+Streamlit re-executes APP.py on every interaction; these holders let a rerun
+reuse the previously loaded value as long as its source has not changed.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+
+def file_signature(path: str) -> Optional[tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None when it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class LeadSnapshot:
+    """
+    Shared leads DataFrame kept current by replaying the store's journal.
+    A rerun after a write costs one small journal query plus the changed rows,
+    rather than a full reload; long or compacted tails fall back to a reload.
+    The frame uses lead_frame's compact encoding (categoricals, datetime Date).
+
+    Derived structures (indexes, counters) attach as views: objects with
+    `rebuild(frame)` and `apply(lead_id, before, after)`, where `before` and
+    `after` are row dicts (None for an insert's before / a delete's after).
+    Archiving a lead removes it from the frame like a delete.
+
+    Writes made through the same store object are pushed to the snapshot as
+    they commit, so reruns only touch the database when the version has moved
+    or `poll_interval` seconds have passed (to pick up other processes).
+    Sessions compare versions to decide whether to re-query: `read()` gives a
+    frame with the version it reflects, `current_version()` the newest known.
+    """
+
+    def __init__(self, store, max_replay: int = 5000, poll_interval: float = 2.0):
+        from lead_frame import CategoryVocabulary
+
+        self.store = store
+        self.max_replay = max_replay
+        self.poll_interval = poll_interval
+        self.vocabulary = CategoryVocabulary()
+        self.version = -1
+        self._latest = -1  # newest version known to exist (notified or polled)
+        self._polled = float("-inf")
+        self._frame = None
+        self._views = []
+        self._lock = threading.Lock()
+        store.subscribe(self.notify)
+
+    def notify(self, version: int):
+        """Record that the store reached `version`; the next read catches up."""
+        with self._lock:
+            self._latest = max(self._latest, version)
+
+    def current_version(self) -> int:
+        """Newest store version, polling the database at most every `poll_interval` seconds."""
+        with self._lock:
+            if self._stale():
+                self._poll()
+            return max(self._latest, self.version)
+
+    def attach(self, view):
+        """Register a view, building it from the current frame. Returns the view."""
+        with self._lock:
+            if self._frame is not None:
+                view.rebuild(self._frame)
+            self._views.append(view)
+        return view
+
+    def read(self):
+        """The current frame together with the store version it reflects."""
+        with self._lock:
+            if self._frame is None or self._latest > self.version or self._stale():
+                self._refresh()
+            return self.version, self._frame
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._polled >= self.poll_interval
+
+    def _poll(self):
+        self._polled = time.monotonic()
+        self._latest = max(self._latest, self.store.version())
+
+    def _refresh(self):
+        self._polled = time.monotonic()
+        if self._frame is not None:
+            tail = self.store.changes_since(self.version, self.max_replay)
+            if tail is not None:
+                version, changes = tail
+                if changes:
+                    self._frame = _replay(self._frame, changes, self._views, self.vocabulary)
+                self.version = version
+                self._latest = max(self._latest, version)
+                return
+        self.version, frame = self.store.snapshot()
+        self._latest = max(self._latest, self.version)
+        self._frame = self.vocabulary.encode(frame)
+        for view in self._views:
+            view.rebuild(self._frame)
+
+
+def _replay(frame, changes, views, vocabulary):
+    """
+    Apply journal changes on top of `frame` without mutating it (other sessions
+    may still hold it). Cells are patched into a shallow copy whose updated
+    columns are copied first (explicitly, so this does not rely on pandas
+    copy-on-write); removals and inserts rebuild the rows once per tail.
+    """
+    import numpy as np
+    import pandas as pd
+    from lead_frame import CATEGORICAL_COLUMNS
+
+    # Grow the shared vocabulary first so every incoming value is a valid category.
+    for column in CATEGORICAL_COLUMNS:
+        vocabulary.learn(column, {c.fields[column] for c in changes if column in c.fields})
+    frame = vocabulary.conform(frame.copy(deep=False))
+    for column in {column for c in changes if c.op == "update" for column in c.fields} & set(frame.columns):
+        frame[column] = frame[column].copy()
+    inserted: dict[int, dict] = {}
+    deleted: set[int] = set()
+    for change in changes:
+        lead_id = change.lead_id
+        present = lead_id in frame.index and lead_id not in deleted
+        if change.op == "insert":
+            before = None
+            after = inserted[lead_id] = dict(change.fields)
+        elif change.op == "update":
+            if lead_id in inserted:
+                before = dict(inserted[lead_id])
+                inserted[lead_id].update(change.fields)
+                after = dict(inserted[lead_id])
+            elif present:
+                before = frame.loc[lead_id].to_dict()
+                for column, value in change.fields.items():
+                    frame.at[lead_id, column] = vocabulary.cell(column, value)
+                after = {**before, **change.fields}
+            else:
+                continue
+        elif change.op in ("delete", "archive"):
+            if lead_id in inserted:
+                before = inserted.pop(lead_id)
+            elif present:
+                before = frame.loc[lead_id].to_dict()
+                deleted.add(lead_id)
+            else:
+                continue
+            after = None
+        else:
+            continue
+        for view in views:
+            view.apply(lead_id, before, after)
+
+    if deleted:
+        keep = np.ones(len(frame), dtype=bool)
+        keep[frame.index.get_indexer(list(deleted))] = False
+        frame = frame[keep]
+    if inserted:
+        new_rows = vocabulary.encode(pd.DataFrame.from_dict(inserted, orient="index", columns=frame.columns))
+        new_rows.index.name = frame.index.name
+        frame = pd.concat([frame, new_rows])
+    return frame
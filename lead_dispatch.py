@@ -0,0 +1,158 @@
+"""
+"Next lead" dispatching.
+LeadDispatcher keeps one binary heap per agent over their open leads, ordered
+by a configurable score, and is patched on every change like the other
+snapshot views. Changed leads get a fresh heap entry and their old one is
+left behind and skipped when popped (lazy deletion), so handing out the
+next lead costs O(log n) whatever the backlog.
+
+The age term uses the lead's date itself rather than "days since", which
+orders leads identically but never goes stale, so heap entries stay valid
+as time passes.
+"""
+
+import datetime
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from lead_frame import date_text
+from lead_schema import CALL_STATUSES
+
+
+@dataclass
+class DispatchWeights:
+    """Score terms, in "days of age" units: a lead is served first when its score is highest."""
+    age_per_day: float = 1.0
+    statuses: dict = field(default_factory=lambda: {"Pending": 3.0, "Failed": 1.0, "In Progress": 0.0})
+    sources: dict = field(default_factory=dict)  # Lead Source -> bonus
+    retry_penalty: float = 2.0  # per earlier Failed attempt
+
+    def priority(self, status: str, source: str, day: int, retries: int) -> Optional[float]:
+        """
+        Heap key (lower is served first) or None if the status is not dispatched.
+        A blank or unknown status counts as the default one, as in the lead form.
+        """
+        if status not in CALL_STATUSES:
+            status = CALL_STATUSES[0]
+        if status not in self.statuses:
+            return None
+        return (self.age_per_day * day - self.statuses[status] - self.sources.get(source, 0.0)
+                + self.retry_penalty * retries)
+
+
+def _day(value) -> int:
+    """Days since 1970-01-01 for a Date value; undated leads count as created today."""
+    text = date_text(value)
+    day = datetime.date.fromisoformat(text) if text else datetime.date.today()
+    return (day - datetime.date(1970, 1, 1)).days
+
+
+class LeadDispatcher:
+    """Per-agent priority queues of open leads; a LeadSnapshot view."""
+
+    def __init__(self, weights: Optional[DispatchWeights] = None,
+                 retries: Optional[Callable[[], dict]] = None):
+        self.weights = weights or DispatchWeights()
+        self._load_retries = retries  # lead id -> earlier Failed attempts, read on rebuild
+        self._heaps: dict[str, list] = {}
+        self._live: dict[int, tuple] = {}  # lead id -> (agent, token) of its current entry
+        self._sizes: dict[str, int] = {}   # agent -> live entries
+        self._retries: dict[int, int] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    # ── View protocol ────────────────────────────────────────────────────────
+
+    def rebuild(self, frame):
+        retries = dict(self._load_retries()) if self._load_retries else {}
+        agents = frame["Assigned Agent"].astype(object).fillna("").to_numpy()
+        statuses = frame["Call status"].astype(object).fillna("").to_numpy()
+        sources = frame["Lead Source"].astype(object).fillna("").to_numpy()
+        dates = frame["Date"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            from lead_frame import parse_dates
+            dates = parse_dates(dates)
+        today = (datetime.date.today() - datetime.date(1970, 1, 1)).days
+        days = dates.to_numpy().astype("datetime64[D]").astype("int64")
+        days = np.where(np.isnat(dates.to_numpy()), today, days)
+        ids = frame.index.to_numpy()
+
+        heaps: dict[str, list] = {}
+        live: dict[int, tuple] = {}
+        sizes: dict[str, int] = {}
+        for lead_id, agent, status, source, day in zip(ids.tolist(), agents, statuses, sources, days.tolist()):
+            if not agent:
+                continue
+            priority = self.weights.priority(status, source, day, retries.get(lead_id, 0))
+            if priority is None:
+                continue
+            token = next(self._tokens)
+            heaps.setdefault(agent, []).append((priority, token, lead_id))
+            live[lead_id] = (agent, token)
+        for agent, heap in heaps.items():
+            heapq.heapify(heap)
+            sizes[agent] = len(heap)
+        with self._lock:
+            self._heaps, self._live, self._sizes, self._retries = heaps, live, sizes, retries
+
+    def apply(self, lead_id: int, before, after):
+        with self._lock:
+            if after and after["Call status"] == "Failed" and (not before or before["Call status"] != "Failed"):
+                self._retries[lead_id] = self._retries.get(lead_id, 0) + 1
+            previous = self._live.pop(lead_id, None)  # any existing entry is now stale
+            if previous is not None:
+                self._sizes[previous[0]] -= 1
+            if not after or not after["Assigned Agent"]:
+                return
+            priority = self.weights.priority(
+                str(after["Call status"]), str(after["Lead Source"]), _day(after["Date"]),
+                self._retries.get(lead_id, 0),
+            )
+            if priority is None:
+                return
+            agent = str(after["Assigned Agent"])
+            token = next(self._tokens)
+            heap = self._heaps.setdefault(agent, [])
+            heapq.heappush(heap, (priority, token, lead_id))
+            self._live[lead_id] = (agent, token)
+            self._sizes[agent] = self._sizes.get(agent, 0) + 1
+            if len(heap) > 64 and len(heap) > 2 * self._sizes[agent]:
+                self._compact(agent)
+
+    # ── Dispatching ──────────────────────────────────────────────────────────
+
+    def next_lead(self, agent: str, exclude: Iterable[int] = ()) -> Optional[int]:
+        """The agent's highest-priority lead not in `exclude`, or None when the queue is empty."""
+        exclude = set(exclude)
+        with self._lock:
+            heap = self._heaps.get(agent, [])
+            set_aside = []
+            found = None
+            while heap:
+                priority, token, lead_id = heap[0]
+                if self._live.get(lead_id) != (agent, token):
+                    heapq.heappop(heap)  # stale entry left by an earlier change
+                    continue
+                if lead_id in exclude:
+                    set_aside.append(heapq.heappop(heap))
+                    continue
+                found = lead_id
+                break
+            for entry in set_aside:
+                heapq.heappush(heap, entry)
+            return found
+
+    def queue_length(self, agent: str) -> int:
+        with self._lock:
+            return self._sizes.get(agent, 0)
+
+    def _compact(self, agent: str):
+        heap = [entry for entry in self._heaps[agent] if self._live.get(entry[2]) == (agent, entry[1])]
+        heapq.heapify(heap)
+        self._heaps[agent] = heap
@@ -0,0 +1,68 @@
+"""
+Streaming lead export.
+Rows come from LeadStore.stream in fixed-size batches and are encoded as they
+arrive, so memory stays flat however many leads match: CSV is produced as a
+generator of byte chunks, XLSX through openpyxl's write-only workbook.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from typing import Iterator, Optional
+
+from lead_store import ID_COLUMN, LeadFilter, LeadStore
+
+CSV = "CSV"
+XLSX = "XLSX"
+FORMATS = {CSV: ("text/csv", ".csv"),
+           XLSX: ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx")}
+
+
+def csv_chunks(store: LeadStore, filters: Optional[LeadFilter] = None, batch_size: int = 5000,
+               archived: bool = False) -> Iterator[bytes]:
+    """UTF-8 (with BOM, for Excel) CSV, one chunk per batch; the first chunk is the header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([ID_COLUMN] + store.columns)
+    yield ("﻿" + buffer.getvalue()).encode("utf-8")
+    for batch in store.stream(filters, batch_size, archived):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(store: LeadStore, target, filters: Optional[LeadFilter] = None,
+               sheet_name: str = "Leads", batch_size: int = 5000, archived: bool = False) -> int:
+    """Write matching leads to a new workbook at `target` (path or binary file); returns the row count."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append([ID_COLUMN] + store.columns)
+    rows = 0
+    for batch in store.stream(filters, batch_size, archived):
+        for row in batch:
+            sheet.append(row)
+        rows += len(batch)
+    workbook.save(target)
+    return rows
+
+
+def spool(store: LeadStore, fmt: str, filters: Optional[LeadFilter] = None, archived: bool = False):
+    """
+    Build the export in an anonymous temporary file and return a read-only
+    handle on it, for consumers that need a file object rather than a stream
+    of chunks. The data goes away when the handle is closed.
+    """
+    with tempfile.TemporaryFile() as handle:
+        if fmt == CSV:
+            for chunk in csv_chunks(store, filters, archived=archived):
+                handle.write(chunk)
+        else:
+            write_xlsx(store, handle, filters, archived=archived)
+        handle.flush()
+        reader = open(os.dup(handle.fileno()), "rb")
+    reader.seek(0)
+    return reader
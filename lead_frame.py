@@ -0,0 +1,90 @@
+"""
+Compact in-memory representation of the lead book.
+Low-cardinality columns are held as pandas categoricals over a vocabulary
+that only ever grows, so codes stay stable for the life of the process and
+equality filters compare integers; Date becomes datetime64. The store and
+journal keep plain text; this encoding applies to the shared snapshot only.
+"""
+
+import datetime
+import threading
+
+import pandas as pd
+
+from lead_schema import BUSINESS_TYPES, CALL_STATUSES
+
+CATEGORICAL_COLUMNS = {
+    "Call status": CALL_STATUSES,
+    "Business type": BUSINESS_TYPES,
+    "GOV": [],
+    "City": [],
+    "Lead Source": [],
+    "Assigned Agent": [],
+    "Tax registered (electronic invoices)": ["Yes", "No"],
+}
+DATE_COLUMN = "Date"
+
+
+def parse_dates(values) -> pd.Series:
+    """Stored date text (YYYY-MM-DD, optionally with a time) as datetime64; blanks and junk become NaT."""
+    return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", format="ISO8601")
+
+
+def date_text(value) -> str:
+    """Canonical YYYY-MM-DD for a stored or decoded Date value ("" when missing or unparseable)."""
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return datetime.date.fromisoformat(value).isoformat()  # the common case, without pandas parsing
+        except ValueError:
+            pass
+    if not isinstance(value, (pd.Timestamp, type(pd.NaT))):
+        value = pd.to_datetime(value, errors="coerce", format="ISO8601") if value else pd.NaT
+    return "" if pd.isna(value) else value.strftime("%Y-%m-%d")
+
+
+class CategoryVocabulary:
+    """Per-column category lists shared by every frame a LeadSnapshot produces."""
+
+    def __init__(self):
+        self._categories = {column: [""] + list(seed) for column, seed in CATEGORICAL_COLUMNS.items()}
+        self._lock = threading.Lock()
+
+    def categories(self, column: str) -> list:
+        with self._lock:
+            return list(self._categories[column])
+
+    def learn(self, column: str, values) -> bool:
+        """Append unseen values (in sorted order); returns True if the vocabulary grew."""
+        with self._lock:
+            known = self._categories[column]
+            unseen = set(values) - set(known)
+            if unseen:
+                known.extend(sorted(unseen))
+            return bool(unseen)
+
+    def encode(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Text columns of `frame` converted in place to the compact dtypes."""
+        for column in CATEGORICAL_COLUMNS:
+            if column in frame.columns:
+                values = frame[column].astype(object).fillna("")
+                self.learn(column, values.unique())
+                frame[column] = pd.Categorical(values, categories=self.categories(column))
+        if DATE_COLUMN in frame.columns and not pd.api.types.is_datetime64_any_dtype(frame[DATE_COLUMN]):
+            frame[DATE_COLUMN] = parse_dates(frame[DATE_COLUMN]).to_numpy()
+        return frame
+
+    def conform(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Give `frame`'s categoricals the current (possibly grown) category lists."""
+        for column in CATEGORICAL_COLUMNS:
+            if column in frame.columns:
+                current = frame[column].cat.categories
+                categories = self.categories(column)
+                if len(current) != len(categories):
+                    frame[column] = frame[column].cat.add_categories(categories[len(current):])
+        return frame
+
+    def cell(self, column: str, value):
+        """A stored text value converted for assignment into an encoded frame."""
+        if column == DATE_COLUMN:
+            return parse_dates([value]).iloc[0]
+        return value
@@ -0,0 +1,113 @@
+"""
+Bulk lead import.
+Uploaded CSV/XLSX files are validated column-wise with pandas string
+operations, deduplicated against the existing book through the mobile number
+index, and handed to the store as one batch. Field updates arriving through
+lead_api are checked against the same rules by `validate_updates`.
+"""
+
+import datetime
+import io
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from lead_store import BUSINESS_TYPES, CALL_STATUSES, COLUMNS
+
+REQUIRED_COLUMNS = ["Customer Name", "Mobile number", "Business Name", "Business type"]
+REJECTION_COLUMN = "Rejection reason"
+
+
+def read_upload(file_name: str, data: bytes) -> pd.DataFrame:
+    """Parse an uploaded CSV or Excel file with every cell kept as text."""
+    if file_name.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(io.BytesIO(data), dtype=str)
+    else:
+        df = pd.read_csv(io.BytesIO(data), dtype=str, encoding="utf-8-sig")
+    return df.dropna(how="all")
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Project onto COLUMNS as stripped strings, filling the same defaults as the onboarding form."""
+    out = pd.DataFrame(index=df.index)
+    for column in COLUMNS:
+        if column in df.columns:
+            out[column] = df[column].fillna("").astype(str).str.strip()
+        else:
+            out[column] = ""
+    out["Mobile number"] = out["Mobile number"].str.replace(r"\.0$", "", regex=True)
+    out.loc[out["Call status"] == "", "Call status"] = CALL_STATUSES[0]
+    out.loc[out["Tax registered (electronic invoices)"] == "", "Tax registered (electronic invoices)"] = "No"
+    out.loc[out["Date"] == "", "Date"] = datetime.date.today().isoformat()
+    return out
+
+
+def validate_leads(
+    df: pd.DataFrame, known_mobiles: Callable[[Iterable[str]], set]
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split normalised leads into (accepted, rejected). `known_mobiles` maps
+    candidate numbers to the subset already in the book. Rejected rows carry
+    the first failing rule in REJECTION_COLUMN.
+    """
+    missing = np.zeros(len(df), dtype=bool)
+    for column in REQUIRED_COLUMNS:
+        missing |= (df[column] == "").to_numpy()
+    mobile = df["Mobile number"]
+    bad_mobile = ~mobile.str.fullmatch(r"\d{11}").to_numpy()
+    bad_type = ~df["Business type"].isin(BUSINESS_TYPES).to_numpy()
+    bad_status = ~df["Call status"].isin(CALL_STATUSES).to_numpy()
+    existing = known_mobiles(mobile[~bad_mobile].unique().tolist())
+    in_book = mobile.isin(existing).to_numpy()
+
+    checks = [
+        (missing, "Missing required field"),
+        (bad_mobile, "Mobile number must be 11 digits"),
+        (bad_type, "Unknown business type"),
+        (bad_status, "Unknown call status"),
+        (in_book, "Mobile number already exists"),
+    ]
+    reason = np.select([mask for mask, _ in checks], [label for _, label in checks], default="").astype(object)
+    # Only rows that pass every other rule compete for a mobile number within the file.
+    passing = reason == ""
+    in_file_dup = passing & mobile.where(passing).duplicated(keep="first").to_numpy()
+    reason[in_file_dup] = "Duplicate mobile number in file"
+    rejected_mask = reason != ""
+
+    rejected = df[rejected_mask].copy()
+    rejected[REJECTION_COLUMN] = reason[rejected_mask]
+    return df[~rejected_mask], rejected
+
+
+def validate_updates(records: list[dict]) -> tuple[dict[int, dict], list[tuple[int, str]]]:
+    """
+    Split status/field updates ({"id": lead id, column: value, ...}) into
+    ({lead_id: changes}, [(position, reason)]). Values follow the import
+    rules; the mobile number identifies a lead and cannot be changed here.
+    A later update of the same lead in the batch is merged over an earlier one.
+    """
+    accepted: dict[int, dict] = {}
+    rejected = []
+    for position, record in enumerate(records):
+        try:
+            lead_id = int(record.get("id"))
+        except (TypeError, ValueError):
+            rejected.append((position, "Missing or invalid lead id"))
+            continue
+        changes = {k: "" if v is None else str(v).strip() for k, v in record.items() if k in COLUMNS}
+        if not changes:
+            reason = "No known columns to update"
+        elif "Mobile number" in changes:
+            reason = "Mobile number cannot be changed"
+        elif any(changes.get(column) == "" for column in REQUIRED_COLUMNS if column in changes):
+            reason = "Missing required field"
+        elif "Business type" in changes and changes["Business type"] not in BUSINESS_TYPES:
+            reason = "Unknown business type"
+        elif "Call status" in changes and changes["Call status"] not in CALL_STATUSES:
+            reason = "Unknown call status"
+        else:
+            accepted.setdefault(lead_id, {}).update(changes)
+            continue
+        rejected.append((position, reason))
+    return accepted, rejected
@@ -0,0 +1,65 @@
+"""
+Incrementally maintained lookups over the shared lead snapshot.
+Lets a view find an agent's queue or a mobile number without scanning the
+whole book.
+"""
+
+import threading
+from typing import Iterable
+
+
+def rows(frame, lead_ids: Iterable[int]):
+    """Rows of `frame` for the given lead ids, silently skipping unknown ids."""
+    positions = frame.index.get_indexer(list(lead_ids))
+    return frame.take(positions[positions >= 0])
+
+
+class LeadIndex:
+    """agent -> lead ids and mobile number -> lead ids."""
+
+    KEYS = ("Assigned Agent", "Mobile number")
+
+    def __init__(self):
+        self._buckets: dict[str, dict[str, set]] = {column: {} for column in self.KEYS}
+        self._lock = threading.Lock()
+
+    def rebuild(self, frame):
+        ids = frame.index.to_numpy()
+        buckets = {}
+        for column in self.KEYS:
+            keys = frame[column]
+            buckets[column] = {
+                key: set(ids[positions].tolist())
+                for key, positions in keys.groupby(keys, sort=False).indices.items()
+                if key
+            }
+        with self._lock:
+            self._buckets = buckets
+
+    def apply(self, lead_id: int, before, after):
+        with self._lock:
+            for column in self.KEYS:
+                old = before[column] if before else None
+                new = after[column] if after else None
+                if old == new:
+                    continue
+                buckets = self._buckets[column]
+                if old and old in buckets:
+                    buckets[old].discard(lead_id)
+                    if not buckets[old]:
+                        del buckets[old]
+                if new:
+                    buckets.setdefault(new, set()).add(lead_id)
+
+    def _lookup(self, column: str, key: str) -> list[int]:
+        with self._lock:
+            return sorted(self._buckets[column].get(key, ()))
+
+    def agent_leads(self, agent: str) -> list[int]:
+        return self._lookup("Assigned Agent", agent)
+
+    def known_mobiles(self, mobiles: Iterable[str]) -> set:
+        """The subset of `mobiles` that already belongs to some lead."""
+        with self._lock:
+            buckets = self._buckets["Mobile number"]
+            return {m for m in mobiles if m in buckets}
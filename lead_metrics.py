@@ -0,0 +1,170 @@
+"""
+Materialised lead counts for the performance views.
+DailyRollup keeps the number of leads per (agent, call status, date) and is
+patched on every change, so a performance page only aggregates the rollup,
+whose size depends on agents x statuses x days rather than on the book.
+The snapshot only holds open leads; archived ones are added from
+ArchiveCounts, which reads the store's trigger-maintained archive rollup.
+LeadCounters serves the dashboard's headline numbers (leads by status, by
+agent and by creation date) straight from the store's counters, so the
+landing page neither loads the snapshot nor scans the book.
+"""
+
+import datetime
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from lead_frame import date_text, parse_dates
+
+KEY_COLUMNS = ["Assigned Agent", "Call status", "Date"]
+
+
+def _text(value) -> str:
+    return "" if pd.isna(value) else str(value)
+
+
+def _key(row) -> tuple[str, str, str]:
+    return _text(row["Assigned Agent"]), _text(row["Call status"]), date_text(row["Date"])
+
+
+class DailyRollup:
+    """Lead counts keyed by (agent, status, date); a LeadSnapshot view."""
+
+    def __init__(self, archive: "ArchiveCounts" = None):
+        self.archive = archive
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def rebuild(self, frame):
+        dates = frame["Date"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.Series(parse_dates(dates).to_numpy(), index=frame.index)
+        # Group on the native dtypes (category codes, datetimes), then key the few groups by text.
+        sizes = frame.groupby([frame["Assigned Agent"], frame["Call status"], dates],
+                              sort=False, observed=True, dropna=False).size()
+        counts = Counter()
+        for (agent, status, date), leads in sizes.items():
+            counts[(_text(agent), _text(status), date_text(date))] += int(leads)
+        with self._lock:
+            self._counts = counts
+
+    def apply(self, lead_id: int, before, after):
+        old = _key(before) if before else None
+        new = _key(after) if after else None
+        if old == new:
+            return
+        with self._lock:
+            if old:
+                self._counts[old] -= 1
+                if self._counts[old] <= 0:
+                    del self._counts[old]
+            if new:
+                self._counts[new] += 1
+
+    def table(self, start: str = "", end: str = "", include_undated: bool = True) -> pd.DataFrame:
+        """Rollup rows (agent, status, date, leads) inside [start, end] (YYYY-MM-DD, inclusive)."""
+        with self._lock:
+            counts = Counter(self._counts)
+        if self.archive is not None:
+            counts.update(self.archive.counts())
+        items = list(counts.items())
+        df = pd.DataFrame([k + (v,) for k, v in items], columns=KEY_COLUMNS + ["Leads"])
+        dates = df["Date"]
+        mask = pd.Series(True, index=df.index)
+        if start:
+            mask &= dates >= start
+        if end:
+            mask &= dates <= end
+        if include_undated:
+            mask |= dates == ""
+        return df[mask]
+
+    def agent_summary(self, start: str = "", end: str = "", include_undated: bool = True) -> pd.DataFrame:
+        """Per-agent totals and call-status breakdown for the date window."""
+        table = self.table(start, end, include_undated)
+        if table.empty:
+            return pd.DataFrame(columns=["Total Leads", "Completed Leads", "Remaining Leads", "Performance Percentage"])
+        pivot = table.pivot_table(index="Assigned Agent", columns="Call status", values="Leads",
+                                  aggfunc="sum", fill_value=0)
+        pivot.columns.name = None
+        summary = pd.DataFrame(index=pivot.index)
+        summary["Total Leads"] = pivot.sum(axis=1)
+        summary["Completed Leads"] = pivot["Completed"] if "Completed" in pivot else 0
+        summary["Remaining Leads"] = summary["Total Leads"] - summary["Completed Leads"]
+        summary["Performance Percentage"] = (summary["Completed Leads"] / summary["Total Leads"] * 100).fillna(0)
+        return summary.join(pivot)
+
+
+class LeadCounters:
+    """
+    Dashboard KPIs from the store's trigger-maintained counters (see
+    LeadStore._init_counts): reading them costs one small query, and neither
+    the snapshot nor a scan of the book is needed.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def totals(self, today: str = "") -> dict:
+        """Headline numbers for the dashboard; `today` is YYYY-MM-DD (defaults to the local date)."""
+        today = today or datetime.date.today().isoformat()
+        counts = {(scope, kind): {} for scope in ("open", "archived") for kind in ("status", "agent", "date")}
+        for scope, kind, key, leads in self.store.lead_totals(today):
+            counts[(scope, kind)][key] = leads
+        by_agent = counts[("open", "agent")]
+        return {
+            "open": sum(counts[("open", "status")].values()),
+            "by_status": counts[("open", "status")],
+            "by_agent": by_agent,
+            "unassigned": by_agent.get("", 0),
+            "created_today": counts[("open", "date")].get(today, 0) + counts[("archived", "date")].get(today, 0),
+            "completed": sum(counts[("archived", "status")].values()),
+        }
+
+    @staticmethod
+    def recount(frame, archived) -> Counter:
+        """Full recount of (scope, kind, key) over an open-lead and an archived-lead frame."""
+        counts = Counter()
+        for scope, leads in (("open", frame), ("archived", archived)):
+            keys = {
+                "status": leads["Call status"],
+                "agent": leads["Assigned Agent"],
+                "date": leads["Date"].astype(str).str[:10],
+            }
+            for kind, column in keys.items():
+                for key, n in column.value_counts().items():
+                    counts[(scope, kind, key)] += int(n)
+        return counts
+
+    def check(self, frame, archived) -> dict:
+        """
+        Differences between the stored counters and a full recount of `frame`
+        (open leads) and `archived` (e.g. store.load() / store.load_archive()),
+        as {(scope, kind, key): (stored, recounted)}; empty when they agree.
+        """
+        stored = Counter({(scope, kind, key): leads for scope, kind, key, leads in self.store.lead_totals()})
+        want = self.recount(frame, archived)
+        return {k: (stored.get(k, 0), want.get(k, 0)) for k in stored.keys() | want.keys()
+                if stored.get(k, 0) != want.get(k, 0)}
+
+
+class ArchiveCounts:
+    """Archived lead counts keyed like DailyRollup, cached per archive version."""
+
+    def __init__(self, store):
+        self.store = store
+        self._version = None
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def counts(self) -> Counter:
+        version = self.store.archive_version()
+        with self._lock:
+            if version != self._version:
+                counts = Counter()
+                for agent, status, date, leads in self.store.archive_counts():
+                    counts[(agent, status, date_text(date))] += leads
+                self._counts, self._version = counts, version
+            return self._counts
@@ -0,0 +1,15 @@
+"""
+Lead field definitions shared by the portal, the store and the import tools.
+Kept free of heavy imports so the portal can read them before pandas loads.
+"""
+
+BUSINESS_TYPES = ["Manufacturer", "Distributor", "Wholesaler", "Retailer", "Service Provider"]
+CALL_STATUSES = ["Pending", "In Progress", "Completed", "Failed"]
+# Statuses of leads still being worked; completed leads are archived out of the working book.
+OPEN_STATUSES = [status for status in CALL_STATUSES if status != "Completed"]
+
+COLUMNS = [
+    "Customer Name", "Mobile number", "Business Name", "Business type", "GOV", "City",
+    "Lead Source", "Call status", "Tax registered (electronic invoices)", "Feedback",
+    "Disqualified reason", "Comment", "Assigned Agent", "Date"
+]
@@ -0,0 +1,999 @@
+"""
+SQLite-backed lead storage.
+Every lead is a row keyed by a stable integer id, so an edit touches one row
+instead of rewriting the whole workbook. Database.xlsx stays available as an
+on-demand export.
+
+Each write transaction also appends compact records to `lead_journal`, so a
+cached snapshot can catch up by replaying the journal tail instead of
+reloading every lead. Subscribers registered with `subscribe` are told the
+new version as soon as a write commits.
+
+Leads in an ARCHIVED_STATUSES status live in a separate `leads_archive`
+table: they are moved there in the same transaction that completes them and
+moved back if they are edited again, so working reads (and the shared
+snapshot) scale with open leads rather than every lead ever created.
+
+A trigram FTS5 index over SEARCH_COLUMNS is kept in sync by triggers, so
+substring and typo-tolerant lookups never scan the table. Triggers also keep
+lead counters (per status, agent and creation date) for the dashboard.
+
+Status transitions can additionally be streamed to an EventLog (see
+lead_events) for funnel analytics.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Mapping, Optional
+
+import pandas as pd
+
+from lead_schema import BUSINESS_TYPES, CALL_STATUSES, COLUMNS, OPEN_STATUSES  # noqa: F401 (re-exported)
+from safe_io import atomic_write, file_lock
+
+INDEXED_COLUMNS = ["Assigned Agent", "Call status", "Mobile number", "GOV", "City", "Date"]
+# Pages can be ordered by these (besides the id): an index on the column is already in (column, id) order.
+SORT_COLUMNS = INDEXED_COLUMNS
+# Counter dimensions kept in lead_totals, as SQL over a lead row; dates are keyed by their day.
+COUNTER_KEYS = {
+    "status": '{row}."Call status"',
+    "agent": '{row}."Assigned Agent"',
+    "date": 'substr({row}."Date", 1, 10)',
+}
+ROLLUP_COLUMNS = ["Assigned Agent", "Call status", "Date"]
+SEARCH_COLUMNS = ["Customer Name", "Business Name", "Mobile number", "City"]
+# Below this length a term has no trigram, so the index cannot serve it.
+MIN_INDEXED_TERM = 3
+# Fuzzy search seeds candidates from the rarest query trigrams and re-ranks a bounded pool.
+FUZZY_SEEDS = 4
+FUZZY_POOL = 1000
+# Inserts at least this large skip the per-row index and counter triggers and update both in bulk.
+BULK_ROWS = 5000
+
+ID_COLUMN = "Lead ID"
+
+ARCHIVE_TABLE = "leads_archive"
+ARCHIVED_STATUSES = [status for status in CALL_STATUSES if status not in OPEN_STATUSES]
+
+
+@dataclass
+class LeadFilter:
+    """Criteria pushed down to SQL by LeadStore.query. Empty fields match everything."""
+    statuses: list[str] = field(default_factory=list)
+    agent: Optional[str] = None  # "" selects unassigned leads
+    gov: str = ""
+    city: str = ""
+    date_from: str = ""  # inclusive, YYYY-MM-DD
+    date_to: str = ""    # inclusive: the whole day, whatever time the stored Date carries
+    search: str = ""     # words found in name, business, mobile or city
+
+    def where(self, indexed_search: bool = True) -> tuple[str, list]:
+        """SQL WHERE clause and parameters; the search index only covers the (hot) leads table."""
+        clauses, params = [], []
+        if self.statuses:
+            clauses.append(f"{_quote('Call status')} IN ({', '.join('?' for _ in self.statuses)})")
+            params.extend(self.statuses)
+        if self.agent is not None:
+            clauses.append(f"{_quote('Assigned Agent')} = ?")
+            params.append(self.agent)
+        for column, value in (("GOV", self.gov), ("City", self.city)):
+            if value:
+                clauses.append(f"{_quote(column)} = ?")
+                params.append(value)
+        if self.date_from:
+            clauses.append(f"{_quote('Date')} >= ?")
+            params.append(self.date_from)
+        if self.date_to:
+            # Stored dates may carry a time ("YYYY-MM-DD HH:MM:SS"), so bound by the next day; the index still applies.
+            clauses.append(f"{_quote('Date')} < date(?, '+1 day')")
+            params.append(self.date_to)
+        match = _match_all(self.search) if indexed_search else None
+        if match:
+            clauses.append("id IN (SELECT rowid FROM lead_search WHERE lead_search MATCH ?)")
+            params.append(match)
+        # Every word must appear; words the index cannot serve (or all of them, off the index) via LIKE.
+        like, like_params = _like_all(_short_words(self.search) if match else self.search.split())
+        if like:
+            clauses.append(like)
+            params.extend(like_params)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class ConflictError(Exception):
+    """Raised when a lead was modified by someone else since it was read."""
+
+    def __init__(self, lead_id: int, current_version: int):
+        super().__init__(f"Lead {lead_id} was modified concurrently (now at version {current_version}).")
+        self.lead_id = lead_id
+        self.current_version = current_version
+
+
+@dataclass
+class Change:
+    version: int
+    op: str       # "insert", "update", "delete"
+    lead_id: int
+    fields: dict  # full row for inserts, changed fields for updates
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _phrase(text: str) -> str:
+    """FTS5 query matching `text` as a literal substring (trigram tokenizer)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _match_all(text: str) -> Optional[str]:
+    """FTS5 query requiring every indexable word of `text` somewhere in the lead; None if there is none."""
+    words = [w for w in text.split() if len(w) >= MIN_INDEXED_TERM]
+    return " AND ".join(_phrase(w) for w in words) or None
+
+
+def _like_all(words: list[str]) -> tuple[str, list]:
+    """SQL condition requiring every word as a substring of some SEARCH_COLUMNS field ("" if no words)."""
+    clauses, params = [], []
+    for word in words:
+        pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append("(" + " OR ".join(f"{_quote(c)} LIKE ? ESCAPE '\\'" for c in SEARCH_COLUMNS) + ")")
+        params.extend([pattern] * len(SEARCH_COLUMNS))
+    return " AND ".join(clauses), params
+
+
+def _short_words(text: str) -> list[str]:
+    """Words of `text` the trigram index cannot serve; they are checked with LIKE instead."""
+    return [w for w in text.split() if len(w) < MIN_INDEXED_TERM]
+
+
+def _trigrams(text: str) -> list[str]:
+    text = " ".join(text.lower().split())
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+def page_key(page: pd.DataFrame, sort_by: Optional[str] = None) -> Optional[tuple]:
+    """The `after` argument of LeadStore.query for the page following `page` (None if it is empty)."""
+    if page.empty:
+        return None
+    return (page[sort_by].iloc[-1] if sort_by else None), int(page.index[-1])
+
+
+def _table(archived: bool) -> str:
+    return ARCHIVE_TABLE if archived else "leads"
+
+
+def _to_text(value) -> str:
+    """Normalise a cell coming from pandas/openpyxl to the TEXT stored in SQLite."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+class LeadStore:
+    """Row-level access to the leads table."""
+
+    def __init__(self, path: str, columns: list[str] = COLUMNS, events=None):
+        self.path = path
+        self.columns = list(columns)
+        self.events = events  # optional lead_events.EventLog receiving status transitions
+        self._listeners = []
+        self._bumped = threading.local()  # version bumped by this thread's open transaction
+        self._init_schema()
+
+    def subscribe(self, callback):
+        """Call `callback(version)` after every write committed through this store object."""
+        self._listeners.append(callback)
+        return callback
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # FULL: in WAL mode each committed batch is fsynced once, so a write the UI confirmed survives power loss.
+        conn.execute("PRAGMA synchronous=FULL")
+        try:
+            with conn:
+                yield conn
+        except BaseException:
+            self._bumped.version = None
+            raise
+        finally:
+            conn.close()
+        version, self._bumped.version = getattr(self._bumped, "version", None), None
+        if version is not None:
+            for callback in self._listeners:
+                callback(version)
+
+    def _init_schema(self):
+        cols = ", ".join(f"{_quote(c)} TEXT NOT NULL DEFAULT ''" for c in self.columns)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS leads (id INTEGER PRIMARY KEY AUTOINCREMENT, {cols})")
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(leads)")}
+            if "row_version" not in existing:
+                # Per-row counter for compare-and-swap updates.
+                conn.execute("ALTER TABLE leads ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1")
+            for column in INDEXED_COLUMNS:
+                index_name = "idx_leads_" + column.lower().replace(" ", "_")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON leads ({_quote(column)})")
+            created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone() is None
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+            if created:
+                # A new database still owes the workbook import, whatever is written to it first.
+                conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('migrated', 0)")
+            # Highest version whose journal records have been compacted away.
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('journal_floor', 0)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lead_journal ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, version INTEGER NOT NULL, "
+                "op TEXT NOT NULL, lead_id INTEGER NOT NULL, fields TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_version ON lead_journal (version)")
+            self._init_search(conn)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (id INTEGER PRIMARY KEY, {cols}, "
+                "row_version INTEGER NOT NULL DEFAULT 1, archived_at TEXT NOT NULL DEFAULT '')"
+            )
+            for column in ("Assigned Agent", "Mobile number", "Date"):
+                index_name = "idx_archive_" + column.lower().replace(" ", "_")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {ARCHIVE_TABLE} ({_quote(column)})")
+            # Bumped whenever the archive changes, for caches of archive aggregates.
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('archive_version', 0)")
+            self._init_counts(conn)
+        # Books created before partitioning keep completed leads in the hot table.
+        self.archive_completed()
+
+    @staticmethod
+    def _init_counts(conn):
+        """
+        Lead counters maintained by triggers in the same transaction as every write:
+        `lead_totals` holds open/archived leads per status, agent and creation date,
+        `archive_rollup` archived leads per (agent, status, date).
+        """
+        created = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lead_totals'").fetchone() is None
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS lead_totals (scope TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, "
+            "leads INTEGER NOT NULL, PRIMARY KEY (scope, kind, key)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS archive_rollup (agent TEXT NOT NULL, status TEXT NOT NULL, "
+            "date TEXT NOT NULL, leads INTEGER NOT NULL, PRIMARY KEY (agent, status, date)) WITHOUT ROWID"
+        )
+        if not created:
+            return
+        rollup = ", ".join(_quote(c) for c in ("Assigned Agent", "Call status", "Date"))
+        for table, scope in (("leads", "open"), (ARCHIVE_TABLE, "archived")):
+            add, remove = [], []
+            for kind, expr in COUNTER_KEYS.items():
+                add.append(
+                    f"INSERT INTO lead_totals VALUES ('{scope}', '{kind}', {expr.format(row='new')}, 1) "
+                    "ON CONFLICT DO UPDATE SET leads = leads + 1;"
+                )
+                remove.append(
+                    f"UPDATE lead_totals SET leads = leads - 1 "
+                    f"WHERE scope = '{scope}' AND kind = '{kind}' AND key = {expr.format(row='old')};"
+                )
+            if table == ARCHIVE_TABLE:
+                add.append(
+                    f"INSERT INTO archive_rollup VALUES ({', '.join('new.' + _quote(c) for c in ROLLUP_COLUMNS)}, 1) "
+                    "ON CONFLICT DO UPDATE SET leads = leads + 1;"
+                )
+                remove.append(
+                    "UPDATE archive_rollup SET leads = leads - 1 WHERE "
+                    + " AND ".join(f"{key} = old.{_quote(c)}" for key, c in zip(("agent", "status", "date"), ROLLUP_COLUMNS))
+                    + ";"
+                )
+            name = f"{table}_counts"
+            conn.execute(f"CREATE TRIGGER {name}_ai AFTER INSERT ON {table} BEGIN {' '.join(add)} END")
+            conn.execute(f"CREATE TRIGGER {name}_ad AFTER DELETE ON {table} BEGIN {' '.join(remove)} END")
+            conn.execute(
+                f"CREATE TRIGGER {name}_au AFTER UPDATE OF {rollup} ON {table} "
+                f"BEGIN {' '.join(remove)} {' '.join(add)} END"
+            )
+        LeadStore._fill_counts(conn)
+
+    @staticmethod
+    def _fill_counts(conn):
+        """Recompute the counter tables from both lead tables."""
+        conn.execute("DELETE FROM lead_totals")
+        conn.execute("DELETE FROM archive_rollup")
+        LeadStore._add_counts(conn, "1", [])
+
+    @staticmethod
+    def _add_counts(conn, where: str, params: list):
+        """Add the leads of both tables matching `where` to the counters, as the insert triggers would."""
+        upsert = "ON CONFLICT DO UPDATE SET leads = leads + excluded.leads"
+        for table, scope in (("leads", "open"), (ARCHIVE_TABLE, "archived")):
+            for kind, expr in COUNTER_KEYS.items():
+                key = expr.format(row=table)
+                conn.execute(
+                    f"INSERT INTO lead_totals SELECT '{scope}', '{kind}', {key}, COUNT(*) FROM {table} "
+                    f"WHERE {where} GROUP BY {key} {upsert}",
+                    params,
+                )
+        keys = ", ".join(_quote(c) for c in ROLLUP_COLUMNS)
+        conn.execute(
+            f"INSERT INTO archive_rollup SELECT {keys}, COUNT(*) FROM {ARCHIVE_TABLE} WHERE {where} GROUP BY {keys} {upsert}",
+            params,
+        )
+
+    def rebuild_counts(self):
+        """Recount the trigger-maintained counters from the lead tables (run once at startup)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._fill_counts(conn)
+
+    def analyze(self):
+        """Refresh the planner's statistics, so a filtered, sorted page walks the sort index when that is cheaper."""
+        with self._connect() as conn:
+            conn.execute("ANALYZE")
+
+    @staticmethod
+    def _init_search(conn):
+        """External-content trigram index over SEARCH_COLUMNS, maintained by triggers."""
+        # Per-trigram document counts, used to pick selective seeds for fuzzy search.
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS lead_search_vocab USING fts5vocab(lead_search, 'row')")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lead_search'").fetchone():
+            return
+        cols = ", ".join(_quote(c) for c in SEARCH_COLUMNS)
+        new = ", ".join(f"new.{_quote(c)}" for c in SEARCH_COLUMNS)
+        old = ", ".join(f"old.{_quote(c)}" for c in SEARCH_COLUMNS)
+        conn.execute(
+            f"CREATE VIRTUAL TABLE lead_search USING fts5({cols}, "
+            "content='leads', content_rowid='id', tokenize='trigram')"
+        )
+        conn.execute(
+            f"CREATE TRIGGER lead_search_ai AFTER INSERT ON leads BEGIN "
+            f"INSERT INTO lead_search (rowid, {cols}) VALUES (new.id, {new}); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER lead_search_ad AFTER DELETE ON leads BEGIN "
+            f"INSERT INTO lead_search (lead_search, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+        )
+        # Only edits to searchable fields touch the index (not assignments or status changes).
+        conn.execute(
+            f"CREATE TRIGGER lead_search_au AFTER UPDATE OF {cols} ON leads BEGIN "
+            f"INSERT INTO lead_search (lead_search, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO lead_search (rowid, {cols}) VALUES (new.id, {new}); END"
+        )
+        conn.execute("INSERT INTO lead_search (lead_search) VALUES ('rebuild')")
+
+    def _bump_version(self, conn) -> int:
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        self._bumped.version = version  # announced to subscribers once the transaction commits
+        return version
+
+    @staticmethod
+    def _journal(conn, version: int, records: list[tuple[str, int, dict]]):
+        conn.executemany(
+            "INSERT INTO lead_journal (version, op, lead_id, fields) VALUES (?, ?, ?, ?)",
+            [(version, op, lead_id, json.dumps(fields, ensure_ascii=False)) for op, lead_id, fields in records],
+        )
+
+    # ── Archive ──────────────────────────────────────────────────────────────
+
+    def _archive(self, conn, version: int, where: str, params: list) -> list[int]:
+        """Move hot leads matching `where` (and an archived status) to the archive; returns their ids."""
+        statuses = ", ".join("?" for _ in ARCHIVED_STATUSES)
+        where = f"({where}) AND {_quote('Call status')} IN ({statuses})"
+        params = list(params) + ARCHIVED_STATUSES
+        ids = [r[0] for r in conn.execute(f"SELECT id FROM leads WHERE {where}", params)]
+        if not ids:
+            return ids
+        select = ", ".join(_quote(c) for c in self.columns)
+        # Not INSERT OR REPLACE: replaced rows would skip the delete triggers that keep the counters.
+        conn.execute(f"DELETE FROM {ARCHIVE_TABLE} WHERE id IN (SELECT id FROM leads WHERE {where})", params)
+        conn.execute(
+            f"INSERT INTO {ARCHIVE_TABLE} (id, {select}, row_version, archived_at) "
+            f"SELECT id, {select}, row_version, datetime('now') FROM leads WHERE {where}",
+            params,
+        )
+        conn.execute(f"DELETE FROM leads WHERE {where}", params)
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'archive_version'")
+        self._journal(conn, version, [("archive", lead_id, {}) for lead_id in ids])
+        return ids
+
+    def _restore(self, conn, version: int, lead_id: int) -> bool:
+        """Move an archived lead back to the hot table (journaled as an insert)."""
+        select = ", ".join(_quote(c) for c in self.columns)
+        row = conn.execute(
+            f"SELECT {select}, row_version FROM {ARCHIVE_TABLE} WHERE id = ?", (lead_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        conn.execute(
+            f"INSERT INTO leads (id, {select}, row_version) VALUES (?, {', '.join('?' * len(row))})",
+            (lead_id,) + tuple(row),
+        )
+        conn.execute(f"DELETE FROM {ARCHIVE_TABLE} WHERE id = ?", (lead_id,))
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'archive_version'")
+        self._journal(conn, version, [("insert", lead_id, dict(zip(self.columns, row[:-1])))])
+        return True
+
+    def archive_completed(self) -> int:
+        """Sweep any hot leads in an archived status into the archive; returns how many moved."""
+        statuses = ", ".join("?" for _ in ARCHIVED_STATUSES)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            pending = conn.execute(
+                f"SELECT 1 FROM leads WHERE {_quote('Call status')} IN ({statuses}) LIMIT 1", ARCHIVED_STATUSES
+            ).fetchone()
+            if pending is None:
+                return 0
+            return len(self._archive(conn, self._bump_version(conn), "1", []))
+
+    def archive_version(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'archive_version'").fetchone()[0]
+
+    def archive_counts(self) -> list[tuple[str, str, str, int]]:
+        """(agent, status, date, leads) for every archived lead, from the trigger-maintained rollup."""
+        with self._connect() as conn:
+            return conn.execute("SELECT agent, status, date, leads FROM archive_rollup WHERE leads > 0").fetchall()
+
+    def lead_totals(self, date: Optional[str] = None) -> list[tuple[str, str, str, int]]:
+        """
+        (scope, kind, key, leads) counters: every status and agent row, and the
+        date rows for `date` only (all of them when `date` is None).
+        """
+        sql = "SELECT scope, kind, key, leads FROM lead_totals WHERE leads != 0"
+        with self._connect() as conn:
+            if date is None:
+                return conn.execute(sql).fetchall()
+            return conn.execute(sql + " AND (kind != 'date' OR key = ?)", (date,)).fetchall()
+
+    def archived_mobiles(self, mobiles: Iterable[str]) -> set:
+        """The subset of `mobiles` that belongs to an archived lead."""
+        return self._mobiles_in([ARCHIVE_TABLE], mobiles)
+
+    def known_mobiles(self, mobiles: Iterable[str]) -> set:
+        """The subset of `mobiles` already in the book, open or archived (for callers without a snapshot)."""
+        return self._mobiles_in(["leads", ARCHIVE_TABLE], mobiles)
+
+    def _mobiles_in(self, tables: list[str], mobiles: Iterable[str]) -> set:
+        mobiles = list(mobiles)
+        found = set()
+        with self._connect() as conn:
+            for start in range(0, len(mobiles), 500):
+                chunk = mobiles[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                for table in tables:
+                    found.update(r[0] for r in conn.execute(
+                        f"SELECT {_quote('Mobile number')} FROM {table} "
+                        f"WHERE {_quote('Mobile number')} IN ({placeholders})", chunk
+                    ))
+        return found
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def version(self) -> int:
+        """Counter bumped by every write; cheap enough to poll on each rerun."""
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def count(self, filters: Optional[LeadFilter] = None, archived: bool = False) -> int:
+        where, params = filters.where(not archived) if filters else ("", [])
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {_table(archived)}{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _is_empty(conn) -> bool:
+        """True when there are no leads at all, open or archived."""
+        return conn.execute(f"SELECT 1 FROM leads UNION ALL SELECT 1 FROM {ARCHIVE_TABLE} LIMIT 1").fetchone() is None
+
+    def load(self) -> pd.DataFrame:
+        """All open (hot) leads as a DataFrame indexed by lead id."""
+        return self.snapshot()[1]
+
+    def load_archive(self) -> pd.DataFrame:
+        """All archived leads as a DataFrame indexed by lead id."""
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT id, {select} FROM {ARCHIVE_TABLE} ORDER BY id").fetchall()
+        return pd.DataFrame.from_records(rows, columns=[ID_COLUMN] + self.columns).set_index(ID_COLUMN)
+
+    def snapshot(self) -> tuple[int, pd.DataFrame]:
+        """All open (hot) leads together with the version they were read at."""
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            rows = conn.execute(f"SELECT id, {select} FROM leads ORDER BY id").fetchall()
+        df = pd.DataFrame.from_records(rows, columns=[ID_COLUMN] + self.columns)
+        return version, df.set_index(ID_COLUMN)
+
+    def query(self, filters: LeadFilter, sort_by: Optional[str] = None, descending: bool = False,
+              offset: int = 0, limit: int = 50, archived: bool = False,
+              after: Optional[tuple] = None) -> pd.DataFrame:
+        """
+        One page of matching leads (from the archive with `archived`), indexed
+        by lead id and ordered by `sort_by` (one of SORT_COLUMNS; default the
+        id). `after` is `page_key` of the previous page: the page then starts
+        right behind it (keyset paging), so deep pages cost no more than the
+        first one; `offset` still counts from there.
+        """
+        if sort_by is not None and sort_by not in SORT_COLUMNS:
+            raise ValueError(f"{sort_by!r} is not a sortable column")
+        where, params = filters.where(not archived)
+        key = f"({_quote(sort_by)}, id)" if sort_by else "id"
+        direction = "DESC" if descending else "ASC"
+        if after is not None:
+            placeholders = "(?, ?)" if sort_by else "?"
+            where += f"{' AND' if where else ' WHERE'} {key} {'<' if descending else '>'} {placeholders}"
+            params = params + (list(after) if sort_by else [after[1]])
+        order = f"{_quote(sort_by)} {direction}, id {direction}" if sort_by else f"id {direction}"
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, {select} FROM {_table(archived)}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)],
+            ).fetchall()
+        df = pd.DataFrame.from_records(rows, columns=[ID_COLUMN] + self.columns)
+        return df.set_index(ID_COLUMN)
+
+    def stream(self, filters: Optional[LeadFilter] = None, batch_size: int = 5000,
+               archived: bool = False) -> Iterator[list[tuple]]:
+        """
+        Matching leads as (id, *columns) tuples, `batch_size` at a time, in id
+        order. The read transaction stays open until the generator is
+        exhausted or closed, so every batch comes from the same snapshot.
+        """
+        where, params = filters.where(not archived) if filters else ("", [])
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            cursor = conn.execute(f"SELECT id, {select} FROM {_table(archived)}{where} ORDER BY id", params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+
+    def search(self, text: str, limit: int = 20, filters: Optional[LeadFilter] = None) -> pd.DataFrame:
+        """
+        Best matches for `text` across SEARCH_COLUMNS, indexed by lead id.
+        Leads containing every word come first, newest first. Only when there
+        are none does the search turn fuzzy and rank leads by the share of
+        `text`'s trigrams they contain, so small typos still find the lead.
+        """
+        filters = filters or LeadFilter()
+        match = _match_all(text)
+        if match is None:
+            # Nothing long enough for the trigram index; plain filtered scan.
+            return self.query(LeadFilter(**{**vars(filters), "search": text.strip()}), limit=limit if text.strip() else 0)
+        where, params = filters.where()
+        short, short_params = _like_all(_short_words(text))
+        if short:
+            where = f"{where} AND {short}" if where else f" WHERE {short}"
+            params = params + short_params
+        # Checked per hit by primary key, so the scan stops as soon as `limit` leads qualify.
+        scope = f" AND EXISTS (SELECT 1 FROM leads{where} AND id = lead_search.rowid)" if where else ""
+        sql = f"SELECT rowid FROM lead_search WHERE lead_search MATCH ?{scope} ORDER BY rowid DESC LIMIT ?"
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            ids = [r[0] for r in conn.execute(sql, [match] + params + [int(limit)])]
+            if not ids:
+                ids = self._fuzzy_ids(conn, text, sql, params, limit)
+            rows = dict((r[0], r[1:]) for r in conn.execute(
+                f"SELECT id, {select} FROM leads WHERE id IN ({', '.join('?' * len(ids))})", ids
+            )) if ids else {}
+        df = pd.DataFrame.from_records([(i,) + tuple(rows[i]) for i in ids if i in rows],
+                                       columns=[ID_COLUMN] + self.columns)
+        return df.set_index(ID_COLUMN)
+
+    @staticmethod
+    def _fuzzy_ids(conn, text: str, sql: str, params: list, limit: int) -> list[int]:
+        grams = _trigrams(text)
+        frequency = dict(conn.execute(
+            f"SELECT term, doc FROM lead_search_vocab WHERE term IN ({', '.join('?' * len(grams))})", grams
+        ).fetchall())
+        seeds = sorted((g for g in grams if g in frequency), key=frequency.get)[:FUZZY_SEEDS]
+        if not seeds:
+            return []
+        pool = [r[0] for r in conn.execute(sql, [" OR ".join(_phrase(g) for g in seeds)] + params + [FUZZY_POOL])]
+        searchable = " || ' ' || ".join(_quote(c) for c in SEARCH_COLUMNS)
+        texts = conn.execute(
+            f"SELECT id, lower({searchable}) FROM leads "
+            f"WHERE id IN ({', '.join('?' * len(pool))})", pool
+        ).fetchall()
+        scored = sorted(texts, key=lambda row: -sum(g in row[1] for g in grams))
+        return [lead_id for lead_id, _ in scored[:limit]]
+
+    def distinct(self, column: str) -> list[str]:
+        """Sorted non-empty values of an indexed column, for filter widgets."""
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"{column!r} is not an indexed column")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT {_quote(column)} FROM leads WHERE {_quote(column)} != '' ORDER BY 1"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def changes_since(self, version: int, limit: int) -> Optional[tuple[int, list[Change]]]:
+        """
+        Journal records written after `version`, with the current version.
+        Returns None when the tail has been compacted away or is longer than
+        `limit`; the caller should take a fresh snapshot instead.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            if version < meta["journal_floor"]:
+                return None
+            rows = conn.execute(
+                # (version, seq) is the version index's own order, so only the tail is read.
+                "SELECT version, op, lead_id, fields FROM lead_journal WHERE version > ? ORDER BY version, seq LIMIT ?",
+                (version, limit + 1),
+            ).fetchall()
+        if len(rows) > limit:
+            return None
+        return meta["version"], [Change(v, op, lead_id, json.loads(fields)) for v, op, lead_id, fields in rows]
+
+    def get(self, lead_id: int) -> Optional[dict]:
+        """One lead, hot or archived."""
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {select} FROM leads WHERE id = ? UNION ALL SELECT {select} FROM {ARCHIVE_TABLE} WHERE id = ?",
+                (int(lead_id), int(lead_id)),
+            ).fetchone()
+        return dict(zip(self.columns, row)) if row else None
+
+    def get_versioned(self, lead_id: int) -> Optional[tuple[dict, int]]:
+        """One lead and its row version, read together, for an edit that will pass it as `expected_version`."""
+        select = ", ".join(_quote(c) for c in self.columns)
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {select}, row_version FROM leads WHERE id = ? "
+                f"UNION ALL SELECT {select}, row_version FROM {ARCHIVE_TABLE} WHERE id = ?",
+                (int(lead_id), int(lead_id)),
+            ).fetchone()
+        return (dict(zip(self.columns, row[:-1])), row[-1]) if row else None
+
+    @staticmethod
+    def _row_version(conn, lead_id: int):
+        return conn.execute(
+            f"SELECT row_version FROM leads WHERE id = ? UNION ALL SELECT row_version FROM {ARCHIVE_TABLE} WHERE id = ?",
+            (lead_id, lead_id),
+        ).fetchone()
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def _row(self, lead: dict) -> list[str]:
+        return [_to_text(lead.get(c, "")) for c in self.columns]
+
+    def insert(self, lead: dict) -> int:
+        return self.insert_many([lead])[0]
+
+    def insert_many(self, leads: Iterable[dict]) -> list[int]:
+        """Insert leads in a single transaction and return their new ids."""
+        return self._insert_rows([self._row(lead) for lead in leads])
+
+    def insert_frame(self, df: pd.DataFrame) -> list[int]:
+        """Insert every row of `df` (missing columns become empty) in a single transaction."""
+        return self._insert_rows(self._frame_rows(df))
+
+    def _frame_rows(self, df: pd.DataFrame) -> list[tuple]:
+        columns = []
+        for column in self.columns:
+            if column not in df.columns:
+                columns.append([""] * len(df))
+            elif pd.api.types.is_float_dtype(df[column]):
+                columns.append(df[column].map(_to_text).tolist())
+            else:
+                columns.append(df[column].astype(object).where(df[column].notna(), "").astype(str).tolist())
+        return list(zip(*columns))
+
+    def _insert_rows(self, rows: list) -> list[int]:
+        if not rows:
+            return []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = self._write_rows(conn, rows)
+        self._record_inserts(ids, rows)
+        return ids
+
+    def _write_rows(self, conn, rows: list) -> list[int]:
+        """Insert `rows` inside an open BEGIN IMMEDIATE transaction; returns their ids."""
+        placeholders = ", ".join("?" for _ in self.columns)
+        sql = f"INSERT INTO leads ({', '.join(_quote(c) for c in self.columns)}) VALUES ({placeholders})"
+        # The write lock is held, so the new ids are consecutive.
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'leads'").fetchone()
+        first_id = (seq[0] if seq else 0) + 1
+        ids = list(range(first_id, first_id + len(rows)))
+        version = self._bump_version(conn)
+        if len(rows) >= BULK_ROWS:
+            self._bulk_write(conn, version, ids, rows)
+            return ids
+        conn.executemany(sql, rows)
+        records = [("insert", lead_id, dict(zip(self.columns, row))) for lead_id, row in zip(ids, rows)]
+        self._journal(conn, version, records)
+        self._archive(conn, version, "id >= ?", [first_id])
+        return ids
+
+    def _bulk_write(self, conn, version: int, ids: list[int], rows: list):
+        """
+        `_write_rows` for large batches: leads in an archived status go straight
+        to the archive instead of through the hot table, and the search index
+        and counters are updated once for the batch rather than by a trigger
+        per row. The triggers are dropped and recreated inside the transaction,
+        so other connections never see them missing.
+        """
+        status_at = self.columns.index("Call status")
+        archived = [(lead_id, row) for lead_id, row in zip(ids, rows) if row[status_at] in ARCHIVED_STATUSES]
+        hot = [(lead_id, row) for lead_id, row in zip(ids, rows) if row[status_at] not in ARCHIVED_STATUSES]
+        names = ["lead_search_ai", "leads_counts_ai", f"{ARCHIVE_TABLE}_counts_ai"]
+        triggers = conn.execute(
+            f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' * len(names))})", names
+        ).fetchall()
+        for name in names:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        select = ", ".join(_quote(c) for c in self.columns)
+        values = ", ".join("?" * (len(self.columns) + 1))
+        conn.executemany(f"INSERT INTO leads (id, {select}) VALUES ({values})", ((i,) + tuple(r) for i, r in hot))
+        conn.executemany(
+            f"INSERT INTO {ARCHIVE_TABLE} (id, {select}, archived_at) VALUES ({values}, datetime('now'))",
+            ((i,) + tuple(r) for i, r in archived),
+        )
+        # Archived rows never took an id from the hot table's sequence; reserve them all.
+        if not conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'leads'", (ids[-1],)).rowcount:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('leads', ?)", (ids[-1],))
+        search = ", ".join(_quote(c) for c in SEARCH_COLUMNS)
+        conn.execute(f"INSERT INTO lead_search (rowid, {search}) SELECT id, {search} FROM leads WHERE id >= ?", (ids[0],))
+        self._add_counts(conn, "id >= ?", [ids[0]])
+        for (sql,) in triggers:
+            conn.execute(sql)
+        if archived:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'archive_version'")
+        # Leads archived on arrival never reach a snapshot, so only the hot ones are journaled.
+        self._journal(conn, version, [("insert", lead_id, dict(zip(self.columns, row))) for lead_id, row in hot])
+
+    def _record_inserts(self, ids: list[int], rows: list):
+        if self.events is not None and ids:
+            agent_at = self.columns.index("Assigned Agent")
+            status_at = self.columns.index("Call status")
+            self.events.append((lead_id, row[agent_at], None, row[status_at]) for lead_id, row in zip(ids, rows))
+
+    def _check_conflict(self, conn, lead_id: int) -> bool:
+        """After a guarded write matched no row: raise if the lead still exists, else return False."""
+        row = self._row_version(conn, lead_id)
+        if row is not None:
+            raise ConflictError(lead_id, row[0])
+        return False
+
+    def update(self, lead_id: int, changes: dict, expected_version: Optional[int] = None) -> bool:
+        """
+        Update the given fields of one lead. Returns False if the lead no longer
+        exists; raises ConflictError if `expected_version` no longer matches.
+        Archived leads are restored first and archived again if they still
+        end up in an archived status.
+        """
+        lead_id = int(lead_id)
+        changes = {k: v for k, v in changes.items() if k in self.columns}
+        if not changes:
+            return self.get(lead_id) is not None
+        changes = {k: _to_text(v) for k, v in changes.items()}
+        assignments = ", ".join(f"{_quote(c)} = ?" for c in changes)
+        sql = f"UPDATE leads SET {assignments}, row_version = row_version + 1 WHERE id = ?"
+        params = list(changes.values()) + [lead_id]
+        if expected_version is not None:
+            sql += " AND row_version = ?"
+            params.append(int(expected_version))
+        transition = None
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self.events is not None and "Call status" in changes:
+                keys = f"{_quote('Assigned Agent')}, {_quote('Call status')}"
+                before = conn.execute(
+                    f"SELECT {keys} FROM leads WHERE id = ? UNION ALL SELECT {keys} FROM {ARCHIVE_TABLE} WHERE id = ?",
+                    (lead_id, lead_id),
+                ).fetchone()
+                if before is not None and before[1] != changes["Call status"]:
+                    agent = changes.get("Assigned Agent", before[0])
+                    transition = (lead_id, agent, before[1], changes["Call status"])
+            version = None
+            cur = conn.execute(sql, params)
+            if cur.rowcount != 1:
+                if not conn.execute(f"SELECT 1 FROM {ARCHIVE_TABLE} WHERE id = ?", (lead_id,)).fetchone():
+                    return self._check_conflict(conn, lead_id)
+                version = self._bump_version(conn)
+                self._restore(conn, version, lead_id)
+                if conn.execute(sql, params).rowcount != 1:
+                    return self._check_conflict(conn, lead_id)
+            version = version or self._bump_version(conn)
+            self._journal(conn, version, [("update", int(lead_id), changes)])
+            self._archive(conn, version, "id = ?", [lead_id])
+        if transition is not None:
+            self.events.append([transition])
+        return True
+
+    def update_many(self, updates: Mapping[int, dict]) -> list[int]:
+        """
+        Apply {lead_id: changes} in a single transaction, without version
+        checks; returns the ids that were updated (unknown ids are skipped).
+        Archived leads are restored and re-archived as in `update`.
+        """
+        updates = {
+            int(lead_id): {k: _to_text(v) for k, v in changes.items() if k in self.columns}
+            for lead_id, changes in updates.items()
+        }
+        updates = {lead_id: changes for lead_id, changes in updates.items() if changes}
+        if not updates:
+            return []
+        keys = f"{_quote('Assigned Agent')}, {_quote('Call status')}"
+        done, records, transitions = [], [], []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = None
+            for lead_id, changes in updates.items():
+                assignments = ", ".join(f"{_quote(c)} = ?" for c in changes)
+                sql = f"UPDATE leads SET {assignments}, row_version = row_version + 1 WHERE id = ?"
+                params = list(changes.values()) + [lead_id]
+                before = None
+                if self.events is not None and "Call status" in changes:
+                    before = conn.execute(
+                        f"SELECT {keys} FROM leads WHERE id = ? UNION ALL SELECT {keys} FROM {ARCHIVE_TABLE} WHERE id = ?",
+                        (lead_id, lead_id),
+                    ).fetchone()
+                if conn.execute(sql, params).rowcount != 1:
+                    if not conn.execute(f"SELECT 1 FROM {ARCHIVE_TABLE} WHERE id = ?", (lead_id,)).fetchone():
+                        continue
+                    version = version or self._bump_version(conn)
+                    self._restore(conn, version, lead_id)
+                    conn.execute(sql, params)
+                version = version or self._bump_version(conn)
+                done.append(lead_id)
+                records.append(("update", lead_id, changes))
+                if before is not None and before[1] != changes["Call status"]:
+                    transitions.append((lead_id, changes.get("Assigned Agent", before[0]), before[1], changes["Call status"]))
+            if not done:
+                return done
+            self._journal(conn, version, records)
+            for start in range(0, len(done), 500):
+                chunk = done[start:start + 500]
+                self._archive(conn, version, f"id IN ({', '.join('?' * len(chunk))})", chunk)
+        if transitions:
+            self.events.append(transitions)
+        return done
+
+    def assign(self, lead_ids: Iterable[int], agent: str) -> int:
+        return self.assign_many({int(i): agent for i in lead_ids})
+
+    def assign_many(self, plan: Mapping[int, str], only_unassigned: bool = False) -> int:
+        """
+        Apply a lead id -> agent plan in one transaction. With `only_unassigned`,
+        leads another writer assigned in the meantime are left alone.
+        Returns the number of leads assigned.
+        """
+        sql = f"UPDATE leads SET {_quote('Assigned Agent')} = ?, row_version = row_version + 1 WHERE id = ?"
+        if only_unassigned:
+            sql += f" AND {_quote('Assigned Agent')} = ''"
+        params = [(agent, int(lead_id)) for lead_id, agent in plan.items()]
+        with self._connect() as conn:
+            updated = conn.executemany(sql, params).rowcount
+            if updated != len(params):
+                # Some rows were skipped; journal only the ones that now carry the planned agent.
+                current = {}
+                for start in range(0, len(params), 500):
+                    chunk = [lead_id for _, lead_id in params[start:start + 500]]
+                    current.update(conn.execute(
+                        f"SELECT id, {_quote('Assigned Agent')} FROM leads WHERE id IN ({', '.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall())
+                params = [(agent, lead_id) for agent, lead_id in params if current.get(lead_id) == agent]
+            if params:
+                records = [("update", lead_id, {"Assigned Agent": agent}) for agent, lead_id in params]
+                self._journal(conn, self._bump_version(conn), records)
+        return len(params)
+
+    def delete(self, lead_id: int, expected_version: Optional[int] = None) -> bool:
+        lead_id = int(lead_id)
+        sql = "DELETE FROM leads WHERE id = ?"
+        params = [lead_id]
+        if expected_version is not None:
+            sql += " AND row_version = ?"
+            params.append(int(expected_version))
+        with self._connect() as conn:
+            cur = conn.execute(sql, params)
+            if cur.rowcount == 1:
+                self._journal(conn, self._bump_version(conn), [("delete", lead_id, {})])
+                return True
+            if conn.execute(sql.replace("FROM leads", f"FROM {ARCHIVE_TABLE}", 1), params).rowcount == 1:
+                # Archived leads are not in any snapshot, so only the archive version moves.
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'archive_version'")
+                return True
+            return self._check_conflict(conn, lead_id)
+
+    # ── Journal compaction ───────────────────────────────────────────────────
+
+    def compact_journal(self, keep: int = 10000) -> int:
+        """
+        Drop all but roughly the newest `keep` journal records (whole batches
+        only) and checkpoint the WAL into the main database file.
+        Returns the number of records removed.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM lead_journal ORDER BY seq DESC LIMIT 1 OFFSET ?", (keep,)
+            ).fetchone()
+            removed = 0
+            if row is not None:
+                floor = row[0]
+                removed = conn.execute("DELETE FROM lead_journal WHERE version <= ?", (floor,)).rowcount
+                conn.execute("UPDATE meta SET value = MAX(value, ?) WHERE key = 'journal_floor'", (floor,))
+        with self._connect() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    # ── Excel interop ────────────────────────────────────────────────────────
+
+    def import_frame(self, df: pd.DataFrame) -> int:
+        """Bulk-load a frame read from Database.xlsx."""
+        df = df.dropna(how="all")
+        return len(self.insert_frame(df))
+
+    def migrate(self, load: Callable[[], pd.DataFrame]) -> int:
+        """
+        One-off import of the legacy workbook: `load()` is only called, and its
+        rows inserted, if this database was never migrated. The check and the
+        insert share one write transaction, so concurrent workers import once.
+        """
+        rows, ids = [], []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            migrated = conn.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+            if migrated is not None and migrated[0]:
+                return 0
+            # Databases created before the flag existed count as migrated once they hold any lead;
+            # newer ones start with migrated = 0, so leads written first (e.g. by the API) do not count.
+            if migrated is None and not self._is_empty(conn):
+                conn.execute("INSERT INTO meta (key, value) VALUES ('migrated', 1)")
+                return 0
+            rows = self._frame_rows(load().dropna(how="all"))
+            if rows:
+                ids = self._write_rows(conn, rows)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', 1)")
+        self._record_inserts(ids, rows)
+        return len(ids)
+
+    def export_excel(self, file_path: str, sheet_name: str):
+        """Write every lead, open and archived, to `sheet_name` of `file_path`, keeping other sheets."""
+        df = pd.concat([self.load(), self.load_archive()]).sort_index().reset_index(drop=True)
+
+        def write(tmp_path):
+            try:
+                with pd.ExcelWriter(tmp_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+            except FileNotFoundError:
+                with pd.ExcelWriter(tmp_path, engine="openpyxl") as writer:
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+        with file_lock(file_path):
+            atomic_write(file_path, write, copy_existing=True)
+
+
+def start_compactor(store: LeadStore, interval: float = 300.0, keep: int = 10000) -> threading.Thread:
+    """Run `store.compact_journal` every `interval` seconds on a daemon thread."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                store.compact_journal(keep)
+            except sqlite3.OperationalError:
+                pass  # database busy; try again next round
+
+    thread = threading.Thread(target=run, name="lead-journal-compactor", daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
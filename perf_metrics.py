@@ -0,0 +1,99 @@
+"""
+Lightweight timing instrumentation for the portal.
+Code paths record their durations under a dotted name ("view.update",
+"store.query", "fraud.stage.Error Level Analysis", ...). Each name keeps a
+bounded window of recent samples, summarised as rolling p50/p95/p99 on the
+admin performance page and dumpable as JSON for offline analysis.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable
+
+WINDOW = 1000  # samples kept per name
+
+
+class TimingRegistry:
+    """Thread-safe rolling windows of durations (seconds), keyed by name."""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self.started = time.time()
+        self._samples: dict[str, deque] = {}
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: str):
+        """Decorator form of `timer`."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def instrument(self, obj, methods: Iterable[str], prefix: str):
+        """Time the given methods of one object instance as `prefix + method`."""
+        for method in methods:
+            setattr(obj, method, self.timed(prefix + method)(getattr(obj, method)))
+        return obj
+
+    def summary(self) -> list[dict]:
+        """One row per name: calls, window size and p50/p95/p99/max in milliseconds."""
+        import numpy as np
+
+        with self._lock:
+            snapshot = {name: (np.fromiter(s, dtype=float), self._counts[name]) for name, s in self._samples.items()}
+        rows = []
+        for name in sorted(snapshot):
+            samples, calls = snapshot[name]
+            p50, p95, p99 = (float(v) for v in np.percentile(samples, [50, 95, 99]) * 1000)
+            rows.append({
+                "name": name, "calls": calls, "window": len(samples),
+                "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+                "max_ms": round(float(samples.max()) * 1000, 2),
+            })
+        return rows
+
+    def dump(self) -> str:
+        """Summary plus the raw windows as JSON."""
+        with self._lock:
+            samples = {name: list(s) for name, s in self._samples.items()}
+        return json.dumps({
+            "started": self.started, "dumped": time.time(), "window": self.window,
+            "summary": self.summary(), "samples": samples,
+        }, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self.started = time.time()
+
+
+# Process-wide registry: module state survives Streamlit reruns.
+REGISTRY = TimingRegistry()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+record = REGISTRY.record
@@ -0,0 +1,67 @@
+"""
+Cross-process file safety helpers.
+Advisory locks serialise writers across portal workers, and atomic writes
+make sure readers only ever see a complete file.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive advisory lock on `path + ".lock"` for the duration of the block."""
+    with open(path + ".lock", "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path: str, write: Callable[[str], None], copy_existing: bool = False):
+    """
+    Call `write(tmp_path)` on a temp file next to `path`, fsync it and rename
+    it over `path`. With `copy_existing` the temp file starts as a copy of the
+    current file, for writers that append to it (e.g. replacing one sheet).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.splitext(path)[1], dir=directory)
+    os.close(fd)
+    try:
+        if copy_existing and os.path.exists(path):
+            shutil.copyfile(path, tmp_path)
+        else:
+            os.remove(tmp_path)
+        write(tmp_path)
+        with open(tmp_path, "rb+") as handle:
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def atomic_write_text(path: str, text: str, encoding: str = "utf-8"):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding=encoding) as handle:
+            handle.write(text)
+
+    atomic_write(path, write)
@@ -0,0 +1,37 @@
+"""
+Timing report for a portal run.
+Enabled with PORTAL_PROFILE=1; marks the elapsed time of each startup phase
+and lists which heavy modules the run ended up importing. For a per-module
+import breakdown run `python -X importtime -m streamlit run APP.py`.
+"""
+
+import os
+import sys
+import time
+
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "PIL", "scipy", "fraud_detector"]
+
+
+def enabled() -> bool:
+    return os.environ.get("PORTAL_PROFILE", "") not in ("", "0")
+
+
+class StartupProfile:
+    """Records (phase, seconds since start) marks for one script run."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks: list[tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        self.marks.append((phase, time.perf_counter() - self.start))
+
+    def report(self) -> str:
+        lines = ["Phase                          Elapsed    Step"]
+        previous = 0.0
+        for phase, elapsed in self.marks:
+            lines.append(f"{phase:<30} {elapsed * 1000:7.1f} ms {(elapsed - previous) * 1000:7.1f} ms")
+            previous = elapsed
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        lines.append("Heavy modules loaded: " + (", ".join(loaded) if loaded else "none"))
+        return "\n".join(lines)
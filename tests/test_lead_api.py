@@ -0,0 +1,47 @@
+"""Request handling of the lead ingestion API."""
+
+import json
+import socket
+import threading
+
+import pytest
+
+from lead_api import serve
+from lead_store import LeadStore
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = serve(LeadStore(str(tmp_path / "leads.db")), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, headers: str, body: bytes = b"") -> tuple[int, dict]:
+    with socket.create_connection(server.server_address, timeout=5) as conn:
+        conn.sendall(f"POST /leads HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode() + body)
+        response = b""
+        while chunk := conn.recv(65536):
+            response += chunk
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1e3"])
+def test_malformed_content_length_is_rejected(server, length):
+    status, payload = post(server, f"Content-Length: {length}\r\n", b"[]")
+    assert status == 400
+    assert payload == {"error": "Invalid Content-Length"}
+
+
+def test_valid_batch_is_accepted(server):
+    body = json.dumps([{
+        "Customer Name": "Mona Ali", "Mobile number": "01000000001",
+        "Business Name": "Mona Trading", "Business type": "Retailer",
+    }]).encode()
+    status, payload = post(server, f"Content-Length: {len(body)}\r\nConnection: close\r\n", body)
+    assert status == 200
+    assert payload == {"inserted": [1], "rejected": []}
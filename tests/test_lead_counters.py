@@ -0,0 +1,121 @@
+"""LeadCounters must always agree with a full recount of the book."""
+
+import random
+from collections import Counter
+
+import pytest
+
+import lead_store
+from lead_frame import date_text
+from lead_metrics import ArchiveCounts, LeadCounters
+from lead_store import CALL_STATUSES, COLUMNS, LeadStore
+
+AGENTS = ["", "alice", "bob", "carol"]
+DATES = ["2026-10-15", "2026-10-16", "2026-10-17 00:00:00", ""]
+
+
+def make_lead(rng, i):
+    lead = dict.fromkeys(COLUMNS, "")
+    lead.update({
+        "Customer Name": f"Customer {i}",
+        "Mobile number": f"010{i:08d}",
+        "Business type": "Retailer",
+        "Call status": rng.choice(CALL_STATUSES),
+        "Assigned Agent": rng.choice(AGENTS),
+        "Date": rng.choice(DATES),
+    })
+    return lead
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LeadStore(str(tmp_path / "leads.db"))
+
+
+def assert_consistent(store):
+    counters = LeadCounters(store)
+    assert counters.check(store.load(), store.load_archive()) == {}
+
+
+def test_counters_follow_random_writes(store):
+    rng = random.Random(7)
+    store.insert_many([make_lead(rng, i) for i in range(300)])
+    assert_consistent(store)
+    next_id = 300
+    for _ in range(600):
+        ids = range(1, next_id + 1)
+        op = rng.choice(["insert", "update", "assign", "archive", "restore", "delete", "update_many"])
+        if op == "insert":
+            store.insert(make_lead(rng, next_id))
+            next_id += 1
+        elif op == "update":
+            store.update(rng.choice(ids), {"Call status": rng.choice(CALL_STATUSES), "Date": rng.choice(DATES)})
+        elif op == "assign":
+            store.assign_many({rng.choice(ids): rng.choice(AGENTS) for _ in range(5)})
+        elif op == "archive":
+            store.update(rng.choice(ids), {"Call status": "Completed"})
+        elif op == "restore":
+            store.update(rng.choice(ids), {"Call status": "Pending", "Assigned Agent": rng.choice(AGENTS)})
+        elif op == "delete":
+            store.delete(rng.choice(ids))
+        else:
+            store.update_many({rng.choice(ids): {"Call status": rng.choice(CALL_STATUSES)} for _ in range(5)})
+    assert_consistent(store)
+
+
+def test_totals_match_the_book(store):
+    rng = random.Random(3)
+    store.insert_many([make_lead(rng, i) for i in range(200)])
+    store.update(1, {"Call status": "Completed"})
+    totals = LeadCounters(store).totals(today="2026-10-17")
+    open_leads, archived = store.load(), store.load_archive()
+
+    assert totals["open"] == len(open_leads)
+    assert totals["completed"] == len(archived)
+    assert totals["by_status"] == open_leads["Call status"].value_counts().to_dict()
+    assert totals["by_agent"] == open_leads["Assigned Agent"].value_counts().to_dict()
+    assert totals["unassigned"] == int((open_leads["Assigned Agent"] == "").sum())
+    created_today = sum(int((frame["Date"].str[:10] == "2026-10-17").sum()) for frame in (open_leads, archived))
+    assert totals["created_today"] == created_today
+
+
+def test_rebuild_restores_drifted_counters(store):
+    rng = random.Random(5)
+    store.insert_many([make_lead(rng, i) for i in range(50)])
+    with store._connect() as conn:
+        conn.execute("UPDATE lead_totals SET leads = leads + 1")
+    assert LeadCounters(store).check(store.load(), store.load_archive())
+    store.rebuild_counts()
+    assert_consistent(store)
+
+
+def test_archive_counts_follow_archiving(store):
+    rng = random.Random(11)
+    store.insert_many([make_lead(rng, i) for i in range(100)])
+    archive = ArchiveCounts(store)
+    for lead_id in range(1, 40):
+        store.update(lead_id, {"Call status": rng.choice(["Completed", "Pending"])})
+    expected = Counter(
+        (row["Assigned Agent"], row["Call status"], date_text(row["Date"]))
+        for _, row in store.load_archive().iterrows()
+    )
+    assert archive.counts() == expected
+
+
+def test_bulk_inserts_keep_counters_and_search(store, monkeypatch):
+    monkeypatch.setattr(lead_store, "BULK_ROWS", 50)
+    rng = random.Random(13)
+    store.insert_many([make_lead(rng, i) for i in range(10)])
+    ids = store.insert_many([make_lead(rng, i) for i in range(10, 210)])
+    assert ids == list(range(11, 211))
+    assert store.insert(make_lead(rng, 210)) == 211
+    assert_consistent(store)
+    assert len(store.load()) + len(store.load_archive()) == 211
+
+    open_ids = list(store.load().index)
+    assert list(store.search(f"Customer {open_ids[-2] - 1}").index)[:1] == [open_ids[-2]]
+    store.update(open_ids[-2], {"Call status": "Completed"})
+    store.update(ids[0], {"Call status": "Pending"})
+    assert_consistent(store)
+    with store._connect() as conn:
+        conn.execute("INSERT INTO lead_search (lead_search) VALUES ('integrity-check')")
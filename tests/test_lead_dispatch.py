@@ -0,0 +1,29 @@
+"""LeadDispatcher queues every open lead assigned to an agent."""
+
+import pandas as pd
+
+from lead_dispatch import LeadDispatcher
+from lead_store import COLUMNS
+
+
+def frame(*leads):
+    rows = [{**dict.fromkeys(COLUMNS, ""), **lead} for lead in leads]
+    return pd.DataFrame(rows, index=pd.Index(range(1, len(rows) + 1), name="Lead ID"))
+
+
+def test_blank_status_lead_is_dispatched():
+    dispatcher = LeadDispatcher()
+    dispatcher.rebuild(frame({"Assigned Agent": "ayman", "Date": "2026-10-01 00:00:00"}))
+    assert dispatcher.next_lead("ayman") == 1
+    assert dispatcher.queue_length("ayman") == 1
+
+
+def test_unknown_status_counts_as_pending():
+    dispatcher = LeadDispatcher()
+    dispatcher.rebuild(frame(
+        {"Assigned Agent": "omnia", "Call status": "In Progress", "Date": "2026-10-01"},
+        {"Assigned Agent": "omnia", "Call status": "Callback", "Date": "2026-10-01"},
+    ))
+    assert dispatcher.next_lead("omnia") == 2
+    dispatcher.apply(3, None, {"Assigned Agent": "omnia", "Call status": "", "Lead Source": "", "Date": "2026-09-01"})
+    assert dispatcher.next_lead("omnia") == 3
@@ -0,0 +1,27 @@
+"""LeadFilter criteria select the same leads however the Date value is stored."""
+
+import pytest
+
+from lead_store import COLUMNS, LeadFilter, LeadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    dates = ["2026-10-16 23:59:59", "2026-10-17 00:00:00", "2026-10-17", "2026-10-17 18:30:00", "2026-10-18"]
+    store.insert_many([
+        {**dict.fromkeys(COLUMNS, ""), "Mobile number": f"010{i:08d}", "Call status": "Pending", "Date": date}
+        for i, date in enumerate(dates)
+    ])
+    return store
+
+
+def test_date_range_includes_the_whole_end_day(store):
+    day = LeadFilter(date_from="2026-10-17", date_to="2026-10-17")
+    assert store.count(day) == 3
+    assert sorted(store.query(day).index) == [2, 3, 4]
+
+
+def test_open_ended_date_ranges(store):
+    assert store.count(LeadFilter(date_to="2026-10-16")) == 1
+    assert store.count(LeadFilter(date_from="2026-10-17")) == 4
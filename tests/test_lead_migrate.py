@@ -0,0 +1,63 @@
+"""LeadStore.migrate imports the legacy workbook into a database exactly once."""
+
+import pandas as pd
+
+from lead_api import LeadIngestor
+from lead_store import COLUMNS, LeadStore
+
+
+def workbook(count):
+    return pd.DataFrame({
+        "Customer Name": [f"Book customer {i}" for i in range(count)],
+        "Mobile number": [f"0100000{i:04d}" for i in range(count)],
+        "Business Name": [f"Shop {i}" for i in range(count)],
+        "Business type": "Retailer",
+        "Call status": "Pending",
+    }).reindex(columns=COLUMNS)
+
+
+def test_migrate_after_api_writes_still_imports_the_book(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    result = LeadIngestor(store).add_leads([{
+        "Customer Name": "From the dialer", "Mobile number": "01199999999",
+        "Business Name": "Dialer shop", "Business type": "Retailer",
+    }])
+    assert len(result["inserted"]) == 1
+
+    assert store.migrate(lambda: workbook(3)) == 3
+    assert len(store.load()) == 4
+
+
+def test_database_predating_the_flag_is_not_reimported(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    store.insert_frame(workbook(2))
+    with store._connect() as conn:
+        conn.execute("DELETE FROM meta WHERE key = 'migrated'")
+
+    def load():
+        raise AssertionError("the workbook must not be read again")
+
+    assert LeadStore(store.path).migrate(load) == 0
+    assert len(store.load()) == 2
+
+
+def test_migrate_imports_exactly_once(tmp_path):
+    path = str(tmp_path / "leads.db")
+    calls = []
+
+    def load():
+        calls.append(1)
+        return workbook(5)
+
+    assert LeadStore(path).migrate(load) == 5
+    assert LeadStore(path).migrate(load) == 0
+    assert len(calls) == 1
+    assert len(LeadStore(path).load()) == 5
+
+
+def test_migrate_once_when_every_lead_was_archived(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    assert store.migrate(lambda: workbook(2).assign(**{"Call status": "Completed"})) == 2
+    assert store.load().empty
+    assert store.migrate(lambda: workbook(2)) == 0
+    assert len(store.load_archive()) == 2
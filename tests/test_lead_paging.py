@@ -0,0 +1,39 @@
+"""Keyset paging through LeadStore.query returns the same pages as OFFSET paging."""
+
+import random
+
+import pytest
+
+from lead_store import COLUMNS, LeadFilter, LeadStore, page_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    rng = random.Random(2)
+    store = LeadStore(str(tmp_path / "leads.db"))
+    store.insert_many([
+        {**dict.fromkeys(COLUMNS, ""), "Mobile number": f"010{i:08d}", "Call status": rng.choice(["Pending", "Failed"]),
+         "City": rng.choice(["", "Cairo", "Giza", "Tanta"]), "Assigned Agent": rng.choice(["", "alice", "bob"])}
+        for i in range(237)
+    ])
+    return store
+
+
+@pytest.mark.parametrize("sort_by", [None, "City", "Assigned Agent"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_match_offset_pages(store, sort_by, descending):
+    filters = LeadFilter(statuses=["Pending"])
+    total = store.count(filters)
+    after, seen = None, []
+    for offset in range(0, total + 25, 25):
+        page = store.query(filters, sort_by=sort_by, descending=descending, limit=25, after=after)
+        expected = store.query(filters, sort_by=sort_by, descending=descending, limit=25, offset=offset)
+        assert list(page.index) == list(expected.index)
+        seen += list(page.index)
+        after = page_key(page, sort_by) or after
+    assert len(seen) == len(set(seen)) == total
+
+
+def test_unindexed_sort_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.query(LeadFilter(), sort_by="Customer Name")
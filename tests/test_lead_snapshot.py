@@ -0,0 +1,53 @@
+"""LeadSnapshot replays the journal without touching frames sessions already hold."""
+
+import pandas as pd
+import pytest
+
+from lead_cache import LeadSnapshot
+from lead_store import COLUMNS, LeadStore
+
+
+def lead(i, **fields):
+    return {**dict.fromkeys(COLUMNS, ""), "Customer Name": f"Customer {i}", "Mobile number": f"010{i:08d}",
+            "Call status": "Pending", "Assigned Agent": "alice", "Date": "2026-10-17", **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    store.insert_many([lead(i) for i in range(20)])
+    return store
+
+
+def test_replay_leaves_the_previous_frame_unchanged(store):
+    snapshot = LeadSnapshot(store, poll_interval=0)
+    _, old = snapshot.read()
+    before = old.copy(deep=True)
+
+    store.update(1, {"Customer Name": "Renamed", "Call status": "Failed", "Date": "2026-10-01"})
+    store.update(2, {"Call status": "Completed"})
+    store.insert(lead(99, **{"Assigned Agent": "bob"}))
+    _, new = snapshot.read()
+
+    assert new is not old
+    assert new.loc[1, "Customer Name"] == "Renamed"
+    pd.testing.assert_frame_equal(old, before)
+
+
+def test_replay_matches_a_fresh_snapshot(store):
+    snapshot = LeadSnapshot(store, poll_interval=0)
+    snapshot.read()
+
+    store.update(3, {"Customer Name": "Renamed", "City": "Tanta"})
+    store.update(4, {"Call status": "Completed"})
+    store.delete(5)
+    new_id = store.insert(lead(50, **{"GOV": "Giza", "Date": "2026-10-18 09:00:00"}))
+    store.update(new_id, {"Call status": "Failed"})
+    store.assign_many({6: "bob", 7: ""})
+    store.update(4, {"Call status": "Pending"})  # restored from the archive
+    version, replayed = snapshot.read()
+
+    fresh = LeadSnapshot(store)
+    fresh_version, expected = fresh.read()
+    assert version == fresh_version
+    pd.testing.assert_frame_equal(replayed.sort_index(), expected.sort_index(), check_categorical=False)
@@ -0,0 +1,48 @@
+"""Row-level writes and search in LeadStore."""
+
+import pytest
+
+from lead_store import COLUMNS, ConflictError, LeadFilter, LeadStore
+
+
+def lead(name, mobile, **fields):
+    return {**dict.fromkeys(COLUMNS, ""), "Customer Name": name, "Mobile number": mobile,
+            "Call status": "Pending", **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LeadStore(str(tmp_path / "leads.db"))
+
+
+def test_stale_version_update_raises_conflict(store):
+    lead_id = store.insert(lead("Mona Ali", "01000000001"))
+    _, version = store.get_versioned(lead_id)
+    assert store.update(lead_id, {"Comment": "first"}, expected_version=version)
+
+    with pytest.raises(ConflictError) as conflict:
+        store.update(lead_id, {"Comment": "second"}, expected_version=version)
+    assert conflict.value.current_version == version + 1
+    assert store.get(lead_id)["Comment"] == "first"
+
+
+def test_stale_version_update_of_archived_lead_raises_conflict(store):
+    lead_id = store.insert(lead("Omar Adel", "01000000002"))
+    _, version = store.get_versioned(lead_id)
+    store.update(lead_id, {"Call status": "Completed"})
+
+    with pytest.raises(ConflictError):
+        store.update(lead_id, {"Call status": "Pending"}, expected_version=version)
+    assert store.get(lead_id)["Call status"] == "Completed"
+
+
+def test_two_character_words_still_filter(store):
+    store.insert_many([
+        lead("Mona Ali", "01000000001", City="Cairo"),
+        lead("Mona Samir", "01000000002", City="Giza"),
+        lead("Al Nour", "01000000003", City="Cairo"),
+    ])
+    assert list(store.search("Mona Al").index) == [1]
+    assert store.count(LeadFilter(search="Mona Al")) == 1
+    assert sorted(store.query(LeadFilter(search="Al")).index) == [1, 3]
+    assert list(store.search("Mona Gi", filters=LeadFilter(city="Giza")).index) == [2]
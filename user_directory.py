@@ -0,0 +1,105 @@
+"""
+In-memory user directory backed by users.json.
+The file is re-parsed only when its mtime/size changes, writes go through an
+advisory lock and an atomic rename, and role/active lookups are answered from
+dicts precomputed at load time.
+"""
+
+import json
+import threading
+from typing import Optional
+
+from lead_cache import file_signature
+from safe_io import atomic_write_text, file_lock
+
+DEFAULT_USERS = {"admin": {"password": "admin", "role": "admin", "active": True}}
+ROLES = ["admin", "agent", "team_leader"]
+
+
+def normalize_role(role: str) -> str:
+    """Canonical role name; older forms saved "team leader" with a space."""
+    return role.strip().lower().replace(" ", "_")
+
+
+def read_users(path: str) -> dict:
+    try:
+        with open(path, "r") as file:
+            users = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {name: dict(record) for name, record in DEFAULT_USERS.items()}
+    for user in users:
+        if "active" not in users[user]:
+            users[user]["active"] = True
+        users[user]["role"] = normalize_role(users[user].get("role", ""))
+    return users
+
+
+class UserDirectory:
+    """Process-wide view of users.json; treat returned dicts as read-only."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._users: dict = {}
+        self._by_role: dict[str, list[str]] = {}
+        self._active_by_role: dict[str, list[str]] = {}
+        self._refresh()
+
+    def _refresh(self):
+        signature = file_signature(self.path)
+        with self._lock:
+            if self._users and signature == self._signature:
+                return
+            users = read_users(self.path)
+            by_role: dict[str, list[str]] = {}
+            active_by_role: dict[str, list[str]] = {}
+            for name, record in users.items():
+                by_role.setdefault(record.get("role", ""), []).append(name)
+                if record["active"]:
+                    active_by_role.setdefault(record.get("role", ""), []).append(name)
+            self._users, self._by_role, self._active_by_role = users, by_role, active_by_role
+            self._signature = signature
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def users(self) -> dict:
+        self._refresh()
+        return self._users
+
+    def get(self, username: str) -> Optional[dict]:
+        return self.users().get(username)
+
+    def role(self, username: str) -> str:
+        record = self.get(username)
+        return record.get("role", "") if record else ""
+
+    def authenticate(self, username: str, password: str) -> bool:
+        record = self.get(username)
+        return bool(record and record["password"] == password and record["active"])
+
+    def active_with_role(self, role: str) -> list[str]:
+        """Active usernames with `role`, precomputed when the file was loaded."""
+        self._refresh()
+        return list(self._active_by_role.get(role, []))
+
+    def agents(self, include_inactive: bool = False) -> list[str]:
+        """Agent usernames, precomputed; deactivated agents only on request (they may still own leads)."""
+        if not include_inactive:
+            return self.active_with_role("agent")
+        self._refresh()
+        return list(self._by_role.get("agent", []))
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def save_user(self, username: str, record: dict):
+        """
+        Create or update one user; fields missing from `record` (e.g. an agent's
+        capacity) keep their stored values. Re-reads under the lock so other
+        workers' edits are kept.
+        """
+        with file_lock(self.path):
+            users = read_users(self.path)
+            users[username] = {**users.get(username, {}), **record}
+            atomic_write_text(self.path, json.dumps(users))
+        self._refresh()